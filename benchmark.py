@@ -0,0 +1,344 @@
+"""Headless benchmarks for the Tic Tac Toe AI search"""
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from bitboard import BitBoard, EMPTY
+from engine import GameState, Engine, DIFFICULTY_SETTINGS
+from search import Searcher, INFINITY
+from symmetry import canonical_position
+from vectorized import HAS_NUMPY, classify_board, classify_stack, encode_boards
+
+BASELINE_VERSION = 1
+CORPUS_FILLS = (0.0, 0.15, 0.35)   # Fraction of the board filled in each corpus position
+TIME_NOISE_FLOOR = 0.005           # Time increases smaller than this many seconds are never reported as regressions
+MCTS_PLAYOUTS = 200                # Fixed playouts per Monte Carlo search, so its measurements are comparable between runs
+
+# (board_size, win_condition, max_depth, opening stones) positions used by the pruning benchmark
+PRUNING_POSITIONS = [
+    (4, 3, 3, []),
+    (4, 3, 4, [(1, 1, "X")]),
+    (4, 4, 5, [(1, 1, "X"), (2, 2, "O")]),
+    (5, 4, 3, []),
+    (5, 4, 4, [(2, 2, "X")]),
+    (5, 4, 4, [(2, 2, "X"), (1, 1, "O"), (2, 1, "X")]),
+]
+
+def build_position(board_size: int, win_condition: int, stones: list) -> BitBoard:
+    """Builds a bitboard with the given (row, col, symbol) stones"""
+    board = BitBoard(board_size, win_condition)
+    for row, col, symbol in stones:
+        board.place(row, col, symbol)
+    return board
+
+def full_window_root(searcher: Searcher, board: BitBoard, player_symbol: str, opponent_symbol: str, max_depth: int, moves: list) -> tuple:
+    """Searches every root move with an open (-inf, inf) window, as the root search did before principal variation search"""
+    best_move = None
+    best_score = -INFINITY
+    for row, col in moves:
+        board.place(row, col, player_symbol)
+        score = -searcher.negamax(board, 0, -INFINITY, INFINITY, opponent_symbol, player_symbol, max_depth, (row, col))
+        board.remove(row, col, player_symbol)
+        if score > best_score:
+            best_score = score
+            best_move = (row, col)
+    return best_move, best_score
+
+def pruning_benchmark() -> list:
+    """Counts nodes searched by the full-window root and by the principal variation root on each benchmark position"""
+    results = []
+    for board_size, win_condition, max_depth, stones in PRUNING_POSITIONS:
+        player_symbol = "O" if len(stones) % 2 else "X"
+        opponent_symbol = "X" if player_symbol == "O" else "O"
+
+        # Each search gets a fresh transposition table so neither benefits from the other's work
+        row_result = {"board_size": board_size, "win_condition": win_condition, "max_depth": max_depth, "stones": len(stones)}
+        for name in ("full_window", "principal_variation"):
+            board = build_position(board_size, win_condition, stones)
+            moves = board.get_empty_spaces()
+            searcher = Searcher()
+            if name == "full_window":
+                _, score = full_window_root(searcher, board, player_symbol, opponent_symbol, max_depth, moves)
+            else:
+                _, score = searcher.search_root(board, player_symbol, opponent_symbol, max_depth, moves)
+            row_result[name] = searcher.nodes
+            row_result[name + "_score"] = score
+
+        # Both searches must agree on the value of the position
+        assert row_result["full_window_score"] == row_result["principal_variation_score"]
+        results.append(row_result)
+    return results
+
+def print_pruning_benchmark(results: list) -> None:
+    """Prints the node counts as a table"""
+    print(f"{'board':>6} {'win':>4} {'depth':>6} {'stones':>7} {'full window':>12} {'PVS':>10} {'saved':>7}")
+    for result in results:
+        saved = 1 - result["principal_variation"] / result["full_window"]
+        print(f"{result['board_size']:>4}x{result['board_size']} {result['win_condition']:>4} {result['max_depth']:>6} {result['stones']:>7} "
+              f"{result['full_window']:>12} {result['principal_variation']:>10} {saved:>7.1%}")
+
+def symmetry_benchmark() -> list:
+    """Counts nodes searched with and without symmetry reduction on each benchmark position and on empty boards"""
+    positions = [(board_size, win_condition, max_depth, []) for board_size, win_condition, max_depth in ((3, 3, 8), (4, 4, 5))]
+    results = []
+    for board_size, win_condition, max_depth, stones in positions + PRUNING_POSITIONS:
+        state = GameState(board_size, win_condition)
+        for row, col, _ in stones:
+            state.apply_move(row, col)
+
+        row_result = {"board_size": board_size, "win_condition": win_condition, "max_depth": max_depth, "stones": len(stones)}
+        children = []
+        for name, symmetry in (("plain", False), ("symmetry", True)):
+            engine = Engine("hard", settings={"time_budget": None, "tablebase": False, "symmetry": symmetry, "candidate_radius": None})
+            move = engine.get_best_move(state, max_depth)
+            row_result[name] = engine.searcher.nodes
+            row_result[name + "_score"] = engine.searcher.best_score
+            child = state.bitboard.copy()
+            child.place(move[0], move[1], state.to_move)
+            children.append(canonical_position(child.bits["X"], child.bits["O"], board_size))
+
+        # Both searches must agree on the value, and their moves must be the same up to symmetry or score the same
+        assert row_result["plain_score"] == row_result["symmetry_score"]
+        row_result["same_move"] = children[0] == children[1]
+        results.append(row_result)
+    return results
+
+def print_symmetry_benchmark(results: list) -> None:
+    """Prints the node counts as a table"""
+    print(f"{'board':>6} {'win':>4} {'depth':>6} {'stones':>7} {'plain':>10} {'symmetry':>10} {'saved':>7} {'same move':>10}")
+    for result in results:
+        saved = 1 - result["symmetry"] / result["plain"]
+        print(f"{result['board_size']:>4}x{result['board_size']} {result['win_condition']:>4} {result['max_depth']:>6} {result['stones']:>7} "
+              f"{result['plain']:>10} {result['symmetry']:>10} {saved:>7.1%} {'yes' if result['same_move'] else 'no':>10}")
+
+def depth_benchmark(time_budget: float = 0.4) -> list:
+    """Reports how deep the Hard AI searches within a time budget on 8x8 positions, branching on every empty square and on candidate moves only"""
+    results = []
+    for board_size, win_condition, moves in build_corpus([8]):
+        if win_condition not in (4, 5):
+            continue
+        state = GameState(board_size, win_condition)
+        for row, col in moves:
+            state.apply_move(row, col)
+
+        row_result = {"board_size": board_size, "win_condition": win_condition, "stones": len(moves)}
+        for name, radius in (("all_squares", None), ("candidates", 2)):
+            engine = Engine("hard", settings={"time_budget": time_budget, "tablebase": False, "candidate_radius": radius})
+            engine.choose_move(state)
+            row_result[name] = engine.completed_depth + 1   # Plies including the root move
+            row_result[name + "_nodes"] = engine.searcher.nodes
+        results.append(row_result)
+    return results
+
+def print_depth_benchmark(results: list) -> None:
+    """Prints the depths reached as a table"""
+    print(f"{'board':>6} {'win':>4} {'stones':>7} {'all squares':>12} {'candidates':>11}")
+    for result in results:
+        print(f"{result['board_size']:>4}x{result['board_size']} {result['win_condition']:>4} {result['stones']:>7} "
+              f"{result['all_squares']:>8} ply {result['candidates']:>7} ply")
+
+def random_boards(board_size: int, count: int, seed: int = 0) -> list:
+    """Returns count seeded list-of-lists boards with a random number of alternating X and O stones"""
+    rng = random.Random(f"batch:{board_size}:{seed}")
+    boards = []
+    for _ in range(count):
+        board = [[EMPTY for _ in range(board_size)] for _ in range(board_size)]
+        cells = rng.sample(range(board_size * board_size), rng.randrange(board_size * board_size + 1))
+        for turn, cell in enumerate(cells):
+            board[cell // board_size][cell % board_size] = "XO"[turn % 2]
+        boards.append(board)
+    return boards
+
+def batch_benchmark(count: int = 20_000) -> list:
+    """Measures boards classified per second by the bitboard code and, when NumPy is installed, by the vectorized stack code"""
+    results = []
+    for board_size, win_condition in ((3, 3), (5, 4), (8, 5)):
+        boards = random_boards(board_size, count)
+        start = time.perf_counter()
+        expected = [classify_board(board, win_condition) for board in boards]
+        result = {"board_size": board_size, "win_condition": win_condition, "python": count / (time.perf_counter() - start), "numpy": None}
+        if HAS_NUMPY:
+            stack = encode_boards(boards)
+            start = time.perf_counter()
+            outcomes = classify_stack(stack, win_condition)
+            result["numpy"] = count / (time.perf_counter() - start)
+            assert outcomes.tolist() == expected   # Both backends must agree on every board
+        results.append(result)
+    return results
+
+def print_batch_benchmark(results: list) -> None:
+    """Prints the classification rates as a table"""
+    print(f"{'board':>6} {'win':>4} {'python boards/s':>16} {'numpy boards/s':>15}")
+    for result in results:
+        numpy_rate = f"{result['numpy']:>15.0f}" if result["numpy"] is not None else f"{'not installed':>15}"
+        print(f"{result['board_size']:>4}x{result['board_size']} {result['win_condition']:>4} {result['python']:>16.0f} {numpy_rate}")
+
+def corpus_depth(board_size: int) -> int:
+    """Returns the fixed search depth used for a board size, so node counts are comparable between runs"""
+    if board_size <= 4:
+        return 3
+    elif board_size <= 6:
+        return 2
+    return 1
+
+def build_corpus(board_sizes=range(3, 9)) -> list:
+    """Returns the fixed benchmark positions as (board_size, win_condition, moves) for every win condition of each board size
+
+    Positions come from seeded random play that stops before anyone wins, so the corpus is identical on every run.
+    """
+    corpus = []
+    for board_size in board_sizes:
+        for win_condition in range(3, board_size + 1):
+            rng = random.Random(f"corpus:{board_size}:{win_condition}")
+            for fill in CORPUS_FILLS:
+                state = GameState(board_size, win_condition)
+                target = int(fill * board_size * board_size)
+                while len(state.moves) < target:
+                    candidates = state.get_empty_spaces()
+                    rng.shuffle(candidates)
+                    for row, col in candidates:
+                        state.apply_move(row, col)
+                        if state.winner is None:
+                            break
+                        state.undo_move()   # Keep the position unfinished so there is something to search
+                    else:
+                        break   # Every move wins, so stop filling here
+                corpus.append((board_size, win_condition, list(state.moves)))
+    return corpus
+
+def position_key(board_size: int, win_condition: int, moves: list, difficulty: str) -> str:
+    """Returns the key that identifies one measurement in a baseline file"""
+    return f"{board_size}x{board_size}/win{win_condition}/stones{len(moves)}/{difficulty}"
+
+def key_selected(key: str, board_sizes, difficulties) -> bool:
+    """Returns whether a baseline key measures one of the board sizes and difficulties asked for"""
+    size = key.split("x", 1)[0]
+    difficulty = key.rsplit("/", 1)[1]
+    return int(size) in board_sizes and difficulty in difficulties
+
+def measure(board_size: int, win_condition: int, moves: list, difficulty: str, track_memory: bool) -> dict:
+    """Searches one corpus position with one difficulty and returns its measurements (nodes are playouts for mcts)"""
+    state = GameState(board_size, win_condition)
+    for row, col in moves:
+        state.apply_move(row, col)
+    if difficulty == "mcts":
+        settings = {"time_budget": None, "playouts": MCTS_PLAYOUTS, "tablebase": False}
+    else:
+        settings = {"time_budget": None, "max_depth": corpus_depth(board_size), "workers": 1, "tablebase": False}
+    engine = Engine(difficulty, seed=0, settings=settings)
+
+    if track_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    move = engine.choose_move(state)
+    seconds = time.perf_counter() - start
+    peak_memory = 0
+    if track_memory:
+        peak_memory = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    nodes = engine.monte_carlo.playouts if engine.monte_carlo is not None else engine.searcher.nodes
+    return {
+        "move": list(move),
+        "nodes": nodes,
+        "seconds": seconds,
+        "nodes_per_second": nodes / seconds if seconds > 0 else 0.0,
+        "peak_memory": peak_memory,
+        "tt_hit_rate": engine.transposition_table.stats()["hit_rate"],
+    }
+
+def run_suite(board_sizes=range(3, 9), difficulties=tuple(DIFFICULTY_SETTINGS), repeat: int = 3, progress=None) -> dict:
+    """Measures every corpus position with every difficulty and returns a baseline dictionary
+
+    Timing is the fastest of repeat untraced searches; peak memory comes from one more, traced search of the same position.
+    """
+    results = {}
+    for board_size, win_condition, moves in build_corpus(board_sizes):
+        for difficulty in difficulties:
+            result = min((measure(board_size, win_condition, moves, difficulty, track_memory=False) for _ in range(repeat)), key=lambda run: run["seconds"])
+            result["peak_memory"] = measure(board_size, win_condition, moves, difficulty, track_memory=True)["peak_memory"]
+            key = position_key(board_size, win_condition, moves, difficulty)
+            results[key] = result
+            if progress is not None:
+                progress(key, result)
+    return {"version": BASELINE_VERSION, "python": platform.python_version(), "results": results}
+
+def compare_results(baseline: dict, current: dict, node_tolerance: float = 0.0, time_tolerance: float = 0.25) -> list:
+    """Returns a description of every regression in current against baseline
+
+    Node counts are deterministic, so by default any increase counts. Times are noisy, so they only
+    count when they grow by more than time_tolerance and by more than TIME_NOISE_FLOOR.
+    """
+    regressions = []
+    for key, old in baseline["results"].items():
+        new = current["results"].get(key)
+        if new is None:
+            regressions.append(f"{key}: missing from this run")
+            continue
+        if new["nodes"] > old["nodes"] * (1 + node_tolerance):
+            regressions.append(f"{key}: nodes {old['nodes']} -> {new['nodes']}")
+        if new["seconds"] > old["seconds"] * (1 + time_tolerance) and new["seconds"] - old["seconds"] > TIME_NOISE_FLOOR:
+            regressions.append(f"{key}: time to move {old['seconds'] * 1000:.1f} ms -> {new['seconds'] * 1000:.1f} ms")
+        if new["peak_memory"] > old["peak_memory"] * (1 + time_tolerance) and new["peak_memory"] - old["peak_memory"] > 64 * 1024:
+            regressions.append(f"{key}: peak memory {old['peak_memory']} -> {new['peak_memory']} bytes")
+    return regressions
+
+def print_result(key: str, result: dict) -> None:
+    """Prints one suite measurement"""
+    print(f"{key:<34} nodes {result['nodes']:>8}  {result['nodes_per_second']:>10.0f} n/s  {result['seconds'] * 1000:>9.1f} ms  "
+          f"{result['peak_memory'] / 1024:>8.0f} KiB  TT hits {result['tt_hit_rate']:>6.1%}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks for the Tic Tac Toe AI search")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+    subparsers.add_parser("pruning", help="node counts of the full-window root against the principal variation root")
+    subparsers.add_parser("symmetry", help="node counts of the search with and without symmetry reduction")
+    subparsers.add_parser("depth", help="depth reached on 8x8 boards with and without candidate move generation")
+    subparsers.add_parser("batch", help="boards per second classified as won, drawn or ongoing, with and without NumPy")
+    for name, help_text in (("run", "run the suite and write a baseline file"), ("compare", "run the suite and compare it against a baseline file")):
+        subparser = subparsers.add_parser(name, help=help_text)
+        subparser.add_argument("baseline", help="baseline JSON file")
+        subparser.add_argument("--sizes", type=int, nargs="+", default=list(range(3, 9)), help="board sizes to run (default 3-8)")
+        subparser.add_argument("--difficulties", nargs="+", default=list(DIFFICULTY_SETTINGS), choices=list(DIFFICULTY_SETTINGS))
+        subparser.add_argument("--repeat", type=int, default=3, help="timed searches per measurement (the fastest is kept)")
+        subparser.add_argument("--quiet", action="store_true", help="do not print each measurement")
+    compare_parser = subparsers.choices["compare"]
+    compare_parser.add_argument("--node-tolerance", type=float, default=0.0, help="allowed relative increase in nodes searched")
+    compare_parser.add_argument("--time-tolerance", type=float, default=0.25, help="allowed relative increase in time to move and peak memory")
+    args = parser.parse_args()
+
+    if args.benchmark == "pruning":
+        print_pruning_benchmark(pruning_benchmark())
+        return
+    if args.benchmark == "symmetry":
+        print_symmetry_benchmark(symmetry_benchmark())
+        return
+    if args.benchmark == "depth":
+        print_depth_benchmark(depth_benchmark())
+        return
+    if args.benchmark == "batch":
+        print_batch_benchmark(batch_benchmark())
+        return
+
+    current = run_suite(args.sizes, args.difficulties, args.repeat, None if args.quiet else print_result)
+    if args.benchmark == "run":
+        with open(args.baseline, "w") as baseline_file:
+            json.dump(current, baseline_file, indent=1, sort_keys=True)
+        print(f"Wrote {len(current['results'])} measurements to {args.baseline}")
+        return
+
+    with open(args.baseline) as baseline_file:
+        baseline = json.load(baseline_file)
+    # Only compare the board sizes and difficulties this run was asked for; a measurement of theirs the run no longer makes is a regression
+    baseline["results"] = {key: value for key, value in baseline["results"].items() if key_selected(key, args.sizes, args.difficulties)}
+    regressions = compare_results(baseline, current, args.node_tolerance, args.time_tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    print(f"{len(regressions)} regression(s) in {len(baseline['results'])} measurements")
+    sys.exit(1 if regressions else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,345 @@
+"""Bitboard board engine for the Tic Tac Toe AI (no GUI dependencies)"""
+from functools import lru_cache
+from symmetry import get_symmetric_zobrist_keys
+from transposition import get_zobrist_keys
+
+EMPTY = " "
+LINE_DIRECTIONS = ((0, 1), (1, 0), (1, 1), (1, -1))   # Row, column, diagonal and anti-diagonal steps
+
+def mask_to_indices(mask: int) -> list:
+    """Returns the index of every set bit of a mask in ascending order"""
+    indices = []
+    while mask:
+        low_bit = mask & -mask
+        indices.append(low_bit.bit_length() - 1)
+        mask ^= low_bit
+    return indices
+
+@lru_cache(maxsize=None)
+def get_win_masks(board_size: int, win_condition: int) -> tuple:
+    """Returns a bitmask for every row, column and diagonal window of win_condition cells"""
+    masks = []
+    span = board_size - win_condition + 1
+
+    for i in range(board_size):
+        for j in range(span):
+            # Row window starting at (i, j) and column window starting at (j, i)
+            masks.append(sum(1 << (i * board_size + j + k) for k in range(win_condition)))
+            masks.append(sum(1 << ((j + k) * board_size + i) for k in range(win_condition)))
+
+    for i in range(span):
+        for j in range(span):
+            # Diagonal from top-left to bottom-right and diagonal from top-right to bottom-left
+            masks.append(sum(1 << ((i + k) * board_size + j + k) for k in range(win_condition)))
+            masks.append(sum(1 << ((i + k) * board_size + board_size - 1 - j - k) for k in range(win_condition)))
+
+    return tuple(masks)
+
+@lru_cache(maxsize=None)
+def get_direction_masks(board_size: int, win_condition: int) -> tuple:
+    """Returns (shift, start_mask) pairs for the four line directions used by the shift-and win test"""
+    span = board_size - win_condition + 1
+    reach = win_condition - 1
+    directions = []
+
+    # Each start mask holds the cells where a window in that direction can begin without wrapping around an edge
+    for shift, rows, cols in (
+        (1, range(board_size), range(span)),                                # Rows
+        (board_size, range(span), range(board_size)),                       # Columns
+        (board_size + 1, range(span), range(span)),                         # Diagonal from top-left to bottom-right
+        (board_size - 1, range(span), range(reach, board_size)),            # Diagonal from top-right to bottom-left
+    ):
+        start_mask = 0
+        for row in rows:
+            for col in cols:
+                start_mask |= 1 << (row * board_size + col)
+        directions.append((shift, start_mask))
+
+    return tuple(directions)
+
+@lru_cache(maxsize=None)
+def get_neighborhoods(board_size: int, radius: int) -> tuple:
+    """Returns, for every square, the indices of the other squares within radius steps of it in any direction"""
+    neighborhoods = []
+    for row in range(board_size):
+        for col in range(board_size):
+            neighborhoods.append(tuple(
+                r * board_size + c
+                for r in range(max(0, row - radius), min(board_size, row + radius + 1))
+                for c in range(max(0, col - radius), min(board_size, col + radius + 1))
+                if (r, c) != (row, col)
+            ))
+    return tuple(neighborhoods)
+
+@lru_cache(maxsize=None)
+def get_square_lines(board_size: int, win_condition: int) -> tuple:
+    """Returns, for every square, the positions in get_win_masks of the win windows that contain it"""
+    square_lines = [[] for _ in range(board_size * board_size)]
+    for line, mask in enumerate(get_win_masks(board_size, win_condition)):
+        for index in mask_to_indices(mask):
+            square_lines[index].append(line)
+    return tuple(tuple(lines) for lines in square_lines)
+
+class BitBoard:
+    """Compact board with one integer bitmask per player symbol"""
+
+    def __init__(self, board_size: int, win_condition: int, symbols: tuple = ("X", "O")) -> None:
+        self.board_size = board_size
+        self.win_condition = win_condition
+        self.bits = {symbol: 0 for symbol in symbols}
+        self.zobrist = {symbol: get_zobrist_keys(board_size, symbol) for symbol in symbols}
+        self.hash = 0   # Zobrist hash of the position, updated incrementally by place and remove
+        self.symmetry_hashes = None   # Hashes of the position's 8 symmetric images, once track_symmetries is called
+        self.symmetry_keys = None
+        self.nearby_counts = None   # Stones within the candidate radius of each square, once track_nearby is called
+        self.nearby_mask = 0        # Squares with at least one stone within the candidate radius
+        self.nearby_radius = None
+        self.neighborhoods = None
+        self.line_counts = None     # Stones each symbol has in every win window, once track_lines is called
+        self.square_lines = None
+        self.active_lines = None    # {window: stones} for the win windows holding at least one stone, once track_lines is called
+        self.full_mask = (1 << (board_size * board_size)) - 1
+        self.win_masks = get_win_masks(board_size, win_condition)
+        self.directions = get_direction_masks(board_size, win_condition)
+
+    @classmethod
+    def from_board(cls, board: list, win_condition: int, symbols: tuple = ("X", "O")) -> "BitBoard":
+        """Builds a bitboard from a list-of-lists board"""
+        bitboard = cls(len(board), win_condition, symbols)
+        for row, line in enumerate(board):
+            for col, symbol in enumerate(line):
+                if symbol != EMPTY:
+                    bitboard.place(row, col, symbol)
+        return bitboard
+
+    @classmethod
+    def from_bits(cls, board_size: int, win_condition: int, bits: dict) -> "BitBoard":
+        """Builds a bitboard from a {symbol: bitmask} mapping (the compact form sent between processes)"""
+        bitboard = cls(board_size, win_condition, tuple(bits))
+        for symbol, symbol_bits in bits.items():
+            while symbol_bits:
+                low_bit = symbol_bits & -symbol_bits
+                row, col = divmod(low_bit.bit_length() - 1, board_size)
+                bitboard.place(row, col, symbol)
+                symbol_bits ^= low_bit
+        return bitboard
+
+    def to_board(self) -> list:
+        """Returns the position as a list-of-lists board"""
+        board = [[EMPTY for _ in range(self.board_size)] for _ in range(self.board_size)]
+        for symbol, bits in self.bits.items():
+            while bits:
+                low_bit = bits & -bits
+                row, col = divmod(low_bit.bit_length() - 1, self.board_size)
+                board[row][col] = symbol
+                bits ^= low_bit
+        return board
+
+    def copy(self) -> "BitBoard":
+        """Returns an independent copy of the bitboard"""
+        clone = self.__class__(self.board_size, self.win_condition, tuple(self.bits))
+        clone.bits = dict(self.bits)
+        clone.zobrist = dict(self.zobrist)
+        clone.hash = self.hash
+        if self.symmetry_hashes is not None:
+            clone.symmetry_hashes = list(self.symmetry_hashes)
+            clone.symmetry_keys = dict(self.symmetry_keys)
+        if self.nearby_counts is not None:
+            clone.nearby_counts = list(self.nearby_counts)
+            clone.nearby_mask = self.nearby_mask
+            clone.nearby_radius = self.nearby_radius
+            clone.neighborhoods = self.neighborhoods
+        if self.line_counts is not None:
+            clone.line_counts = {symbol: counts.copy() for symbol, counts in self.line_counts.items()}
+            clone.square_lines = self.square_lines
+            clone.active_lines = dict(self.active_lines)
+        return clone
+
+    def index(self, row: int, col: int) -> int:
+        """Returns the bit index of a square"""
+        return row * self.board_size + col
+
+    def place(self, row: int, col: int, symbol: str) -> None:
+        """Places a symbol on an empty square"""
+        index = row * self.board_size + col
+        keys = self.zobrist.get(symbol)
+        if keys is None:
+            keys = self.zobrist[symbol] = get_zobrist_keys(self.board_size, symbol)
+        self.bits[symbol] = self.bits.get(symbol, 0) | (1 << index)
+        self.hash ^= keys[index]
+        if self.symmetry_hashes is not None:
+            self.update_symmetry_hashes(index, symbol)
+        if self.nearby_counts is not None:
+            self.update_nearby(index, 1)
+        if self.line_counts is not None:
+            self.update_lines(index, symbol, 1)
+
+    def remove(self, row: int, col: int, symbol: str) -> None:
+        """Removes a symbol from a square (undoes place)"""
+        index = row * self.board_size + col
+        self.bits[symbol] &= ~(1 << index)
+        self.hash ^= self.zobrist[symbol][index]
+        if self.symmetry_hashes is not None:
+            self.update_symmetry_hashes(index, symbol)
+        if self.nearby_counts is not None:
+            self.update_nearby(index, -1)
+        if self.line_counts is not None:
+            self.update_lines(index, symbol, -1)
+
+    def track_symmetries(self) -> None:
+        """Starts keeping the hashes of the position's rotations and reflections up to date, for symmetry-aware caching"""
+        if self.symmetry_hashes is not None:
+            return
+        self.symmetry_hashes = [0] * 8
+        self.symmetry_keys = {}
+        for symbol, bits in self.bits.items():
+            while bits:
+                low_bit = bits & -bits
+                self.update_symmetry_hashes(low_bit.bit_length() - 1, symbol)
+                bits ^= low_bit
+
+    def update_symmetry_hashes(self, index: int, symbol: str) -> None:
+        """Toggles a stone on square index in all 8 symmetric hashes"""
+        keys = self.symmetry_keys.get(symbol)
+        if keys is None:
+            keys = self.symmetry_keys[symbol] = get_symmetric_zobrist_keys(self.board_size, symbol)
+        self.symmetry_hashes = [position_hash ^ key for position_hash, key in zip(self.symmetry_hashes, keys[index])]
+
+    def canonical_hash(self) -> tuple:
+        """Returns (hash, symmetry): the smallest hash over the 8 symmetric images and the symmetry that produces it
+
+        Symmetric positions share this hash. Requires track_symmetries.
+        """
+        canonical = min(self.symmetry_hashes)
+        return canonical, self.symmetry_hashes.index(canonical)
+
+    def track_nearby(self, radius: int) -> None:
+        """Starts keeping the set of squares within radius of a stone up to date, for candidate move generation"""
+        if self.nearby_counts is not None:
+            return
+        self.nearby_radius = radius
+        self.neighborhoods = get_neighborhoods(self.board_size, radius)
+        self.nearby_counts = [0] * (self.board_size * self.board_size)
+        self.nearby_mask = 0
+        occupied = self.occupied
+        while occupied:
+            low_bit = occupied & -occupied
+            self.update_nearby(low_bit.bit_length() - 1, 1)
+            occupied ^= low_bit
+
+    def update_nearby(self, index: int, delta: int) -> None:
+        """Adds delta stones to the counts of every square near square index"""
+        counts = self.nearby_counts
+        nearby_mask = self.nearby_mask
+        for neighbor in self.neighborhoods[index]:
+            count = counts[neighbor] + delta
+            counts[neighbor] = count
+            # A square joins the mask with its first nearby stone and leaves it with its last
+            if count == 1 and delta == 1:
+                nearby_mask |= 1 << neighbor
+            elif count == 0:
+                nearby_mask &= ~(1 << neighbor)
+        self.nearby_mask = nearby_mask
+
+    def track_lines(self) -> None:
+        """Starts keeping each symbol's stone count in every win window up to date, for scoring moves without rescanning"""
+        if self.line_counts is not None:
+            return
+        self.square_lines = get_square_lines(self.board_size, self.win_condition)
+        self.line_counts = {}
+        self.active_lines = {}
+        for symbol, bits in self.bits.items():
+            self.line_counts[symbol] = self.new_line_counts()
+            while bits:
+                low_bit = bits & -bits
+                self.update_lines(low_bit.bit_length() - 1, symbol, 1)
+                bits ^= low_bit
+
+    def get_line_counts(self, symbol: str) -> list:
+        """Returns a copy of symbol's stone count in every win window, as a list in get_win_masks order"""
+        return list(self.line_counts[symbol])
+
+    def new_line_counts(self) -> list:
+        """Returns the stone counts of one symbol with no stones: one entry per win window"""
+        return [0] * len(self.win_masks)
+
+    def update_lines(self, index: int, symbol: str, delta: int) -> None:
+        """Adds delta stones of symbol to every win window through square index"""
+        counts = self.line_counts.get(symbol)
+        if counts is None:
+            counts = self.line_counts[symbol] = self.new_line_counts()
+        active_lines = self.active_lines
+        for line in self.square_lines[index]:
+            counts[line] += delta
+            # Windows join the active set with their first stone and leave it with their last
+            stones = active_lines.get(line, 0) + delta
+            if stones:
+                active_lines[line] = stones
+            else:
+                del active_lines[line]
+
+    def get(self, row: int, col: int) -> str:
+        """Returns the symbol on a square, or EMPTY"""
+        bit = 1 << (row * self.board_size + col)
+        for symbol, bits in self.bits.items():
+            if bits & bit:
+                return symbol
+        return EMPTY
+
+    @property
+    def occupied(self) -> int:
+        """Bitmask of all filled squares"""
+        occupied = 0
+        for bits in self.bits.values():
+            occupied |= bits
+        return occupied
+
+    def is_full(self) -> bool:
+        """Checks if every square is filled"""
+        return self.occupied == self.full_mask
+
+    def get_empty_spaces(self) -> list:
+        """Returns a list of coordinates for all empty spaces in row-major order"""
+        free = self.full_mask & ~self.occupied
+        empty_spaces = []
+        while free:
+            low_bit = free & -free
+            empty_spaces.append(divmod(low_bit.bit_length() - 1, self.board_size))
+            free ^= low_bit
+        return empty_spaces
+
+    def is_win(self, player_symbol: str) -> bool:
+        """Checks if the specified player has win_condition symbols in a line"""
+        bits = self.bits.get(player_symbol, 0)
+        if bits.bit_count() < self.win_condition:
+            return False
+
+        # Shift-and test: a bit survives only if the next win_condition - 1 cells in that direction are also set
+        for shift, start_mask in self.directions:
+            run = bits & start_mask
+            step = shift
+            for _ in range(self.win_condition - 1):
+                if not run:
+                    break
+                run &= bits >> step
+                step += shift
+            if run:
+                return True
+        return False
+
+    def is_win_at(self, row: int, col: int, player_symbol: str) -> bool:
+        """Checks if the move at (row, col) completed a line, walking out from that square in the four directions"""
+        bits = self.bits.get(player_symbol, 0)
+        board_size = self.board_size
+
+        for d_row, d_col in LINE_DIRECTIONS:
+            count = 1
+            for sign in (1, -1):
+                r, c = row + sign * d_row, col + sign * d_col
+                while 0 <= r < board_size and 0 <= c < board_size and (bits >> (r * board_size + c)) & 1:
+                    count += 1
+                    r += sign * d_row
+                    c += sign * d_col
+            if count >= self.win_condition:
+                return True
+        return False
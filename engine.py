@@ -0,0 +1,362 @@
+"""Headless Tic Tac Toe core: players, game state, win/draw detection and the AI engine (no GUI dependencies)"""
+import random
+import time
+from bitboard import BitBoard, EMPTY
+from evaluation import WIN_SCORE
+from instrumentation import InstrumentedSearcher, SearchProfiler
+from mcts import MonteCarloTreeSearch
+from movegen import generate_moves
+from ordering import MoveOrderer
+from parallel_search import ParallelSearcher
+from search import Searcher, SearchTimeout
+from sparse_board import new_board, SparseBoard, SPARSE_CANDIDATE_RADIUS
+from symmetry import get_position_symmetries, unique_moves
+from tablebase import load_tablebase
+from transposition import TranspositionTable
+
+# Per-difficulty AI settings; time_budget is the wall-clock seconds the AI may spend searching each move
+# (None for no limit), max_depth optionally caps the search depth, move_ordering sorts the moves at every
+# node by their lines, killer moves and history, workers > 1 splits the root moves across that many
+# processes, tablebase plays perfect moves from a prebuilt tablebase (see tablebase.py) when one exists for the board, and symmetry
+# searches only one of each set of root moves the board's symmetries make equivalent and caches symmetric positions once,
+# and candidate_radius limits the search to forcing moves and squares within that many steps of a stone (None for all;
+# narrowed to SPARSE_CANDIDATE_RADIUS on gomoku-scale boards).
+# The mcts difficulty uses Monte Carlo tree search instead, running playouts until its time_budget or its number
+# of playouts runs out; heuristic_rollouts makes the playouts take wins and block threats
+DIFFICULTY_SETTINGS = {
+    "easy": {"time_budget": 0.0, "max_depth": None, "move_ordering": False, "workers": 1, "tablebase": False, "symmetry": False, "candidate_radius": None},
+    "hard": {"time_budget": 0.2, "max_depth": None, "move_ordering": False, "workers": 1, "tablebase": True, "symmetry": True, "candidate_radius": 2},
+    "very_hard": {"time_budget": 0.4, "max_depth": None, "move_ordering": True, "workers": 1, "tablebase": True, "symmetry": True, "candidate_radius": 2},
+    "mcts": {"time_budget": 1.0, "playouts": None, "heuristic_rollouts": True, "tablebase": True, "candidate_radius": 2},
+}
+
+class Player:
+    """Player Class for Tic Tac Toe Game"""
+
+    def __init__(self, name: str, symbol: str, difficulty=None) -> None:
+        self.name = name
+        self.symbol = symbol
+        self.difficulty = difficulty
+
+class PlayerStatistics:
+    """Class to track player statistics for the current session."""
+
+    def __init__(self):
+        self.statistics = {}
+
+    def record_win(self, player_name):
+        """Record a win for the player."""
+        if player_name in self.statistics:   # Check if the player has already played a game
+            self.statistics[player_name]["wins"] += 1   # Increment wins by 1
+        else:
+            self.statistics[player_name] = {"wins": 1, "losses": 0, "draws": 0}   # Create a new record of this player and increment their wins by 1
+
+    def record_loss(self, player_name):
+        """Record a loss for the player."""
+        if player_name in self.statistics:   # Check if the player has already played a game
+            self.statistics[player_name]["losses"] += 1   # Increment losses by 1
+        else:
+            self.statistics[player_name] = {"wins": 0, "losses": 1, "draws": 0}   # Create a new record of this player and increment their losses by 1
+
+    def record_draw(self, player_name):
+        """Record a draw for the player."""
+        if player_name in self.statistics:   # Check if the player has already played a game
+            self.statistics[player_name]["draws"] += 1   # Increment draws by 1
+        else:
+            self.statistics[player_name] = {"wins": 0, "losses": 0, "draws": 1}   # Create a new record of this player and increment their draws by 1
+
+    def get_player_stats(self, player_name):
+        """Get the statistics for the specified player."""
+        return self.statistics.get(player_name, {"wins": 0, "losses": 0, "draws": 0})
+
+class GameState:
+    """Position, turn order and result of one game"""
+
+    def __init__(self, board_size: int, win_condition: int, symbols: tuple = ("X", "O")) -> None:
+        self.board_size = board_size
+        self.win_condition = win_condition
+        self.symbols = symbols
+        self.board = [[EMPTY for _ in range(board_size)] for _ in range(board_size)]   # List-of-lists view for display code
+        self.bitboard = new_board(board_size, win_condition, symbols)   # Sparse on gomoku-scale boards
+        self.moves = []       # (row, col) of every move played, in order
+        self.winner = None    # Symbol of the winning player once the game is won
+
+    @property
+    def to_move(self) -> str:
+        """Symbol of the player whose turn it is"""
+        return self.symbols[len(self.moves) % 2]
+
+    @property
+    def opponent(self) -> str:
+        """Symbol of the player who is not on turn"""
+        return self.symbols[(len(self.moves) + 1) % 2]
+
+    def get_empty_spaces(self) -> list:
+        """Returns a list of coordinates for all empty spaces on the board"""
+        return self.bitboard.get_empty_spaces()
+
+    def is_valid_move(self, row: int, col: int) -> bool:
+        """Checks if the square is on the board and empty, and the game is still going"""
+        return not self.is_over() and 0 <= row < self.board_size and 0 <= col < self.board_size and self.board[row][col] == EMPTY
+
+    def apply_move(self, row: int, col: int) -> None:
+        """Plays the side to move on (row, col) and records a win if the move completes a line"""
+        if not self.is_valid_move(row, col):
+            raise ValueError(f"Invalid move ({row}, {col}).")
+        symbol = self.to_move
+        self.board[row][col] = symbol
+        self.bitboard.place(row, col, symbol)
+        self.moves.append((row, col))
+
+        # Only lines through the square just played can have become a win
+        if self.bitboard.is_win_at(row, col, symbol):
+            self.winner = symbol
+
+    def undo_move(self) -> None:
+        """Takes back the last move"""
+        row, col = self.moves.pop()
+        symbol = self.to_move
+        self.board[row][col] = EMPTY
+        self.bitboard.remove(row, col, symbol)
+        self.winner = None
+
+    def is_draw(self) -> bool:
+        """Checks if the board is full without a winner"""
+        return self.winner is None and len(self.moves) == self.board_size * self.board_size
+
+    def is_over(self) -> bool:
+        """Checks if the game has been won or drawn"""
+        return self.winner is not None or len(self.moves) == self.board_size * self.board_size
+
+    def reset(self) -> None:
+        """Clears the board for a new game with the same settings"""
+        self.__init__(self.board_size, self.win_condition, self.symbols)
+
+    def copy(self) -> "GameState":
+        """Returns an independent copy of the game, e.g. for an AI search running in another thread"""
+        clone = GameState(self.board_size, self.win_condition, self.symbols)
+        clone.board = [list(row) for row in self.board]
+        clone.bitboard = self.bitboard.copy()
+        clone.moves = list(self.moves)
+        clone.winner = self.winner
+        return clone
+
+class Engine:
+    """AI opponent for one game; keeps its transposition table alive across turns"""
+
+    def __init__(self, difficulty: str = "hard", seed=None, settings: dict = None) -> None:
+        self.difficulty = difficulty
+        self.settings = {**DIFFICULTY_SETTINGS[difficulty], **(settings or {})}   # Overrides replace the difficulty's defaults
+        self.random = random.Random(seed)
+        self.transposition_table = TranspositionTable()
+        self.searcher = Searcher(self.transposition_table)
+        self.move_orderer = MoveOrderer()
+        if self.settings.get("move_ordering"):
+            self.searcher.move_orderer = self.move_orderer
+        self.monte_carlo = None   # Tree search kept between turns, for the mcts difficulty
+        if difficulty == "mcts":
+            self.monte_carlo = MonteCarloTreeSearch(self.random, self.settings["candidate_radius"], self.settings["heuristic_rollouts"])
+        self.parallel_searcher = None   # Process pool searcher, started the first time the settings ask for it
+        self.completed_depth = None     # Deepest max_depth the last iterative deepening search completed
+        self.profiler = None            # SearchProfiler recording every serial search while profiling is enabled
+
+    def get_searcher(self):
+        """Returns the serial searcher, or the process pool searcher when the settings ask for several workers"""
+        workers = self.settings["workers"]
+        if workers > 1:
+            if self.parallel_searcher is None:
+                self.parallel_searcher = ParallelSearcher(workers, self.settings["move_ordering"])
+                self.parallel_searcher.stopped = self.searcher.stopped   # Keep a cancel that came in before the pool existed
+            return self.parallel_searcher
+        return self.searcher
+
+    def choose_move(self, state: GameState) -> tuple:
+        """Returns the AI's move for the side to move, using the time budget and depth cap of its difficulty"""
+        if self.monte_carlo is not None:
+            return self.monte_carlo_move(state)
+        return self.iterative_deepening(state, self.settings["time_budget"], self.settings["max_depth"])
+
+    def get_best_move(self, state: GameState, max_depth: int, previous_best: tuple = None) -> tuple:
+        """Uses the minimax algorithm with alpha-beta pruning to determine the best move for the side to move"""
+        if state.bitboard.is_full():
+            return None   # A full board has no move to search
+        if self.monte_carlo is not None:
+            return self.monte_carlo_move(state)
+        player_symbol, opponent_symbol = state.to_move, state.opponent
+
+        # The search runs on a copy of the position so the game state is never touched mid-search
+        bitboard = state.bitboard.copy()
+        empty_spaces = bitboard.get_empty_spaces()
+
+        # Check if the AI difficulty is easy
+        if self.difficulty == "easy":
+            # Add randomness to the decision-making process so that AI will be more prone to mistakes
+            return self.random.choice(empty_spaces)
+
+        radius = self.get_candidate_radius(bitboard)
+        if radius is not None:
+            # Branch only on threats and squares near the stones, here and at every node below
+            bitboard.track_nearby(radius)
+            empty_spaces = generate_moves(bitboard, player_symbol, opponent_symbol)
+
+        if self.settings["symmetry"]:
+            # Moves that map onto each other under a symmetry of the position lead to equivalent games.
+            # A position with no symmetry but the identity skips both the de-duplication and the
+            # canonical hashing below, since neither saves anything there
+            symmetries = get_position_symmetries(list(bitboard.bits.values()), bitboard.board_size)
+            if len(symmetries) > 1:
+                empty_spaces = unique_moves(empty_spaces, symmetries, bitboard.board_size)
+                bitboard.track_symmetries()
+
+        if self.settings["move_ordering"]:
+            # Generate a list of moves sorted by a heuristic function
+            empty_spaces = self.order_moves(bitboard, empty_spaces, player_symbol, opponent_symbol)
+
+        searcher = self.get_searcher()
+
+        # Search the best move from the previous (shallower) pass first, with an aspiration window around its score
+        guess = None
+        if previous_best in empty_spaces:
+            empty_spaces.remove(previous_best)
+            empty_spaces.insert(0, previous_best)
+            guess = searcher.best_score
+
+        # Principal variation search at the root: alpha tightens as better root scores come in
+        best_move, _ = searcher.search_root(bitboard, player_symbol, opponent_symbol, max_depth, empty_spaces, guess)
+        return best_move
+
+    def get_candidate_radius(self, bitboard: BitBoard):
+        """Returns how far from a stone the search considers moves: the difficulty's radius, narrowed on sparse boards"""
+        radius = self.settings["candidate_radius"]
+        if radius is not None and isinstance(bitboard, SparseBoard):
+            return min(radius, SPARSE_CANDIDATE_RADIUS)
+        return radius
+
+    def iterative_deepening(self, state: GameState, time_budget: float, depth_limit: int = None) -> tuple:
+        """Searches one ply deeper per pass until the time budget runs out and returns the deepest completed result"""
+        if state.bitboard.is_full():
+            return None   # A full board has no move to search
+        if self.difficulty == "easy":
+            return self.get_best_move(state, 0)
+        if self.monte_carlo is not None:
+            return self.monte_carlo.search(state, time_budget, self.settings["playouts"])
+
+        # Small boards with a prebuilt tablebase need no search at all
+        tablebase_move = self.probe_tablebase(state)
+        if tablebase_move is not None:
+            return tablebase_move
+
+        if self.profiler is not None:
+            self.profiler.start_move(state)
+
+        deadline = time.perf_counter() + time_budget if time_budget is not None else None
+        best_move = None
+        self.completed_depth = None
+        self.move_orderer.new_search()
+        searcher = self.get_searcher()
+        searcher.nodes = 0
+
+        # max_depth counts the plies searched below each root move, so the empty squares bound the useful depth
+        max_useful_depth = len(state.get_empty_spaces())
+        if depth_limit is not None:
+            max_useful_depth = min(max_useful_depth, depth_limit + 1)
+        for max_depth in range(max_useful_depth):
+            # The first pass always completes so there is a move to return
+            searcher.deadline = deadline if best_move is not None else None
+            try:
+                best_move = self.get_best_move(state, max_depth, best_move)
+            except SearchTimeout:
+                break   # Keep the result of the deepest completed pass
+            finally:
+                searcher.deadline = None
+            self.completed_depth = max_depth
+
+            # A forced win or loss will not change with more depth
+            if abs(searcher.best_score) >= WIN_SCORE:
+                break
+
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+
+        return best_move
+
+    def monte_carlo_move(self, state: GameState) -> tuple:
+        """Returns the most visited move of a Monte Carlo tree search, reusing the tree from the previous turn"""
+        tablebase_move = self.probe_tablebase(state)
+        if tablebase_move is not None:
+            return tablebase_move
+        return self.monte_carlo.search(state, self.settings["time_budget"], self.settings["playouts"])
+
+    @property
+    def nodes(self) -> int:
+        """Positions searched so far for the current or last move (playouts for Monte Carlo tree search)"""
+        if self.monte_carlo is not None:
+            return self.monte_carlo.playouts
+        # Read without get_searcher(), which would start the process pool just to report a statistic
+        if self.settings["workers"] > 1 and self.parallel_searcher is not None:
+            return self.parallel_searcher.nodes
+        return self.searcher.nodes
+
+    def enable_profiling(self, profiler: SearchProfiler = None) -> SearchProfiler:
+        """Routes the serial search through an InstrumentedSearcher reporting to profiler (a new one if not given) and returns the profiler
+
+        Searches that run across several worker processes are not profiled.
+        """
+        self.profiler = profiler if profiler is not None else SearchProfiler()
+        searcher = InstrumentedSearcher(self.profiler, self.transposition_table)
+        searcher.move_orderer = self.searcher.move_orderer
+        self.searcher = searcher
+        return self.profiler
+
+    def disable_profiling(self) -> None:
+        """Goes back to the plain searcher, which has no instrumentation overhead"""
+        searcher = Searcher(self.transposition_table)
+        searcher.move_orderer = self.searcher.move_orderer
+        self.searcher = searcher
+        self.profiler = None
+
+    def cancel(self) -> None:
+        """Asks a search running in another thread to stop as soon as possible; its move should be ignored"""
+        self.searcher.stopped = True
+        if self.parallel_searcher is not None:
+            self.parallel_searcher.stopped = True
+        if self.monte_carlo is not None:
+            self.monte_carlo.stopped = True
+
+    def clear_cancel(self) -> None:
+        """Lets searches run again after cancel; call it before starting a search, from the thread that cancels
+
+        Searches never clear the flag themselves, so a cancel that arrives before the search thread
+        gets going is not lost.
+        """
+        self.searcher.stopped = False
+        if self.parallel_searcher is not None:
+            self.parallel_searcher.stopped = False
+        if self.monte_carlo is not None:
+            self.monte_carlo.stopped = False
+
+    def probe_tablebase(self, state: GameState):
+        """Returns the perfect-play move from the tablebase for this board, or None if there is none to use"""
+        if not self.settings["tablebase"] or state.is_over():
+            return None
+        tablebase = load_tablebase(state.board_size, state.win_condition)
+        if tablebase is None:
+            return None
+        first_symbol, second_symbol = state.symbols
+        return tablebase.best_move(state.bitboard.bits[first_symbol], state.bitboard.bits[second_symbol])
+
+    def order_moves(self, bitboard: BitBoard, empty_spaces: list, player_symbol: str, opponent_symbol: str) -> list:
+        """Orders the available moves best first in one pass over the lines through each square (only for Very Hard difficulty)"""
+        return self.move_orderer.order(bitboard, empty_spaces, player_symbol, opponent_symbol)
+
+    def reset(self) -> None:
+        """Forgets cached positions and move ordering history before a new game"""
+        self.transposition_table.clear()
+        self.move_orderer.clear()
+        if self.monte_carlo is not None:
+            self.monte_carlo.clear()
+
+    def close(self) -> None:
+        """Stops any search worker processes"""
+        if self.parallel_searcher is not None:
+            self.parallel_searcher.close()
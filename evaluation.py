@@ -0,0 +1,79 @@
+"""Threat-based static evaluation of Tic Tac Toe positions for depth-limited search"""
+from functools import lru_cache
+from bitboard import get_win_masks, mask_to_indices
+
+WIN_SCORE = 1_000_000_000   # Score of a won position; every heuristic score stays far below it
+RUN_BASE = 4                # Each extra stone in an unblocked window is worth RUN_BASE times more
+
+@lru_cache(maxsize=None)
+def get_window_table(board_size: int, win_condition: int) -> tuple:
+    """Returns (window_mask, end_mask, end_count) for every win window on the board
+
+    The end mask holds the in-bounds squares just beyond each end of the window, which decide
+    whether a run in that window is open (both ends free), half-open (one end free) or closed.
+    """
+    table = []
+    for mask in get_win_masks(board_size, win_condition):
+        cells = mask_to_indices(mask)
+        first_row, first_col = divmod(cells[0], board_size)
+        last_row, last_col = divmod(cells[-1], board_size)
+
+        # Recover the direction of the window from its first two squares
+        second_row, second_col = divmod(cells[1], board_size)
+        d_row, d_col = second_row - first_row, second_col - first_col
+
+        end_mask = 0
+        end_count = 0
+        for row, col in ((first_row - d_row, first_col - d_col), (last_row + d_row, last_col + d_col)):
+            if 0 <= row < board_size and 0 <= col < board_size:
+                end_mask |= 1 << (row * board_size + col)
+                end_count += 1
+        table.append((mask, end_mask, end_count))
+    return tuple(table)
+
+@lru_cache(maxsize=None)
+def get_run_weights(win_condition: int) -> tuple:
+    """Returns weights indexed by [stones in the window][free ends of the window]"""
+    return tuple(tuple(RUN_BASE ** stones * (1 + free_ends) if stones else 0 for free_ends in range(3)) for stones in range(win_condition + 1))
+
+def evaluate_position(board, player_symbol: str, opponent_symbol: str) -> int:
+    """Scores a bitboard position from player_symbol's point of view
+
+    Every window that only one side has stones in is a potential line for that side. It scores
+    more the more stones it holds and the more of its ends are free, and the opponent's windows
+    count against the player.
+    """
+    player_bits = board.bits.get(player_symbol, 0)
+    opponent_bits = board.bits.get(opponent_symbol, 0)
+    occupied = player_bits | opponent_bits
+    weights = get_run_weights(board.win_condition)
+    score = 0
+
+    if board.active_lines is not None:
+        # Boards that track their lines only score the windows that hold a stone, which are the only
+        # ones that can score, so the cost follows the stones on the board rather than its area
+        table = get_window_table(board.board_size, board.win_condition)
+        mine_counts = board.line_counts[player_symbol]
+        their_counts = board.line_counts[opponent_symbol]
+        for line in board.active_lines:
+            mine = mine_counts[line]
+            theirs = their_counts[line]
+            if mine:
+                if not theirs:
+                    _, end_mask, end_count = table[line]
+                    score += weights[mine][end_count - (end_mask & occupied).bit_count()]
+            elif theirs:
+                _, end_mask, end_count = table[line]
+                score -= weights[theirs][end_count - (end_mask & occupied).bit_count()]
+        return score
+
+    for mask, end_mask, end_count in get_window_table(board.board_size, board.win_condition):
+        mine = player_bits & mask
+        theirs = opponent_bits & mask
+        if mine:
+            if not theirs:
+                score += weights[mine.bit_count()][end_count - (end_mask & occupied).bit_count()]
+        elif theirs:
+            score -= weights[theirs.bit_count()][end_count - (end_mask & occupied).bit_count()]
+
+    return score
@@ -0,0 +1,272 @@
+"""Compact binary game records: a streaming writer, a generator reader and parallel blunder analysis (no GUI dependencies)
+
+A record file starts with MAGIC and a version byte, followed by the records back to back. Each record is a
+RECORD_HEADER (board size, win condition, player codes of X and O, result and move count) followed by the
+moves, one byte per move holding its cell index (row * board_size + col), or two little-endian bytes on
+boards with more than 256 squares. A 3x3 game takes at most 16 bytes.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import struct
+import sys
+import time
+from array import array
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from engine import Engine, GameState
+from evaluation import WIN_SCORE
+from statistics_store import DRAW, FIRST_WINS, SECOND_WINS
+from tablebase import load_tablebase
+
+RECORDS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "games.ttgr")
+MAGIC = b"TTGR"
+VERSION = 1
+FILE_HEADER = struct.Struct("<4sB")        # Magic, version
+RECORD_HEADER = struct.Struct("<BBBBBH")   # Board size, win condition, X's player code, O's player code, result, move count
+UNFINISHED = 3                             # Result of a game that was abandoned (DRAW, FIRST_WINS and SECOND_WINS as in statistics_store)
+PLAYERS = ("human", "easy", "hard", "very_hard", "mcts")   # Player codes are indices into this tuple
+ANALYSIS_DEPTH = 3        # Plies searched below each move when re-scoring games without a tablebase
+ANALYSIS_BATCH_SIZE = 64  # Games handed to an analysis worker at a time
+
+GameRecord = namedtuple("GameRecord", ["board_size", "win_condition", "first_player", "second_player", "result", "moves"])
+
+def get_move_width(board_size: int) -> int:
+    """Returns the bytes used per move: one while every cell index fits in a byte"""
+    return 1 if board_size * board_size <= 256 else 2
+
+def get_player_code(player: str) -> int:
+    """Returns the code of a player name: a difficulty, an engine spec such as 'hard:max_depth=3', or 'human'"""
+    difficulty = player.partition(":")[0]
+    return PLAYERS.index(difficulty) if difficulty in PLAYERS else 0
+
+def encode_record(board_size: int, win_condition: int, first_player: str, second_player: str, result: int, moves) -> bytes:
+    """Returns the bytes of one record; moves are cell indices"""
+    moves = array("B" if get_move_width(board_size) == 1 else "H", moves)
+    if sys.byteorder != "little":
+        moves.byteswap()
+    return RECORD_HEADER.pack(board_size, win_condition, get_player_code(first_player), get_player_code(second_player), result, len(moves)) + moves.tobytes()
+
+class GameRecordWriter:
+    """Appends game records to a file as each game finishes"""
+
+    def __init__(self, path: str = RECORDS_PATH) -> None:
+        self.path = path
+        exists = os.path.exists(path) and os.path.getsize(path) > 0
+        if exists:
+            with open(path, "rb") as file:
+                check_file_header(file.read(FILE_HEADER.size), path)
+        self.file = open(path, "ab")
+        if not exists:
+            self.file.write(FILE_HEADER.pack(MAGIC, VERSION))
+        self.count = 0   # Records written by this writer
+
+    def write(self, board_size: int, win_condition: int, first_player: str, second_player: str, result: int, moves) -> None:
+        """Appends one record in a single write, so a crash can only ever cut off the last record"""
+        self.file.write(encode_record(board_size, win_condition, first_player, second_player, result, moves))
+        self.count += 1
+
+    def write_state(self, state, first_player: str, second_player: str) -> None:
+        """Appends the record of a GameState, finished or not"""
+        if state.winner is not None:
+            result = FIRST_WINS if state.winner == state.symbols[0] else SECOND_WINS
+        else:
+            result = DRAW if state.is_draw() else UNFINISHED
+        self.write(state.board_size, state.win_condition, first_player, second_player, result, [row * state.board_size + col for row, col in state.moves])
+
+    def flush(self) -> None:
+        """Pushes the buffered records to the operating system"""
+        self.file.flush()
+
+    def close(self) -> None:
+        """Writes any buffered records and closes the file"""
+        self.file.close()
+
+    def __enter__(self) -> "GameRecordWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+def check_file_header(header: bytes, path: str) -> None:
+    """Raises ValueError unless header starts a game record file of this version"""
+    if len(header) < FILE_HEADER.size or FILE_HEADER.unpack(header) != (MAGIC, VERSION):
+        raise ValueError(f"{path} is not a version {VERSION} game record file.")
+
+def read_records(path: str):
+    """Yields every GameRecord of a file in order, one at a time, so files of any size are read in constant memory
+
+    A record cut short at the end of the file (e.g. by a crash while it was written) is skipped.
+    """
+    header_size = RECORD_HEADER.size
+    unpack_header = RECORD_HEADER.unpack
+    with open(path, "rb", buffering=1 << 20) as file:
+        check_file_header(file.read(FILE_HEADER.size), path)
+        while True:
+            header = file.read(header_size)
+            if len(header) < header_size:
+                return
+            board_size, win_condition, first_code, second_code, result, count = unpack_header(header)
+            width = 1 if board_size * board_size <= 256 else 2
+            data = file.read(count * width)
+            if len(data) < count * width:
+                return
+            if width == 1:
+                moves = data
+            else:
+                moves = array("H", data)
+                if sys.byteorder != "little":
+                    moves.byteswap()
+            yield GameRecord(board_size, win_condition, PLAYERS[first_code], PLAYERS[second_code], result, moves)
+
+# Analysis engines are kept per worker process, one per board, so their tables carry over between games
+_analysis_engines = {}
+
+def get_analysis_engine(board_size: int, win_condition: int):
+    """Returns this process's analysis engine for a board: the Very Hard search with no time limit"""
+    key = (board_size, win_condition)
+    if key not in _analysis_engines:
+        _analysis_engines[key] = Engine("very_hard", settings={"time_budget": None, "workers": 1, "tablebase": False})
+    return _analysis_engines[key]
+
+def score_position(state, depth: int) -> tuple:
+    """Returns (outcome, best move) for the side to move of an unfinished game: outcome is 1 for a win, 0 for a draw or unclear, -1 for a loss
+
+    The outcome is exact when a tablebase covers the board, and otherwise comes from a search depth plies below each move.
+    """
+    tablebase = load_tablebase(state.board_size, state.win_condition)
+    first_symbol, second_symbol = state.symbols
+    if tablebase is not None:
+        first_bits, second_bits = state.bitboard.bits[first_symbol], state.bitboard.bits[second_symbol]
+        score = tablebase.lookup(first_bits, second_bits)
+        if score is not None:
+            return (score > 0) - (score < 0), tablebase.best_move(first_bits, second_bits)
+
+    engine = get_analysis_engine(state.board_size, state.win_condition)
+    max_depth = min(depth, len(state.get_empty_spaces()) - 1)
+    best_move = engine.get_best_move(state, max_depth)
+    score = engine.searcher.best_score
+    return (score >= WIN_SCORE) - (score <= -WIN_SCORE), best_move
+
+def analyze_record(record: GameRecord, depth: int = ANALYSIS_DEPTH, include_humans: bool = False) -> list:
+    """Replays a game and returns its blunders: AI moves after which the mover's outcome is worse than with the best move
+
+    Each position is scored once; the outcome of a move is the negated outcome of the position it leads to.
+    """
+    state = GameState(record.board_size, record.win_condition)
+    players = (record.first_player, record.second_player)
+    outcomes = []   # (outcome, best move) of every position before a move, from the mover's point of view
+    for index in record.moves:
+        outcomes.append(score_position(state, depth))
+        state.apply_move(*divmod(index, record.board_size))
+
+    blunders = []
+    for ply, index in enumerate(record.moves):
+        player = players[ply % 2]
+        if player == "human" and not include_humans:
+            continue
+        best_outcome, best_move = outcomes[ply]
+        if ply + 1 < len(outcomes):
+            played_outcome = -outcomes[ply + 1][0]
+        else:
+            # The last move ended the game (or the record stops here)
+            played_outcome = {DRAW: 0, UNFINISHED: best_outcome}.get(record.result, 1)
+        if played_outcome < best_outcome:
+            blunders.append({"ply": ply, "player": player, "move": divmod(index, record.board_size), "best_move": best_move,
+                             "best_outcome": best_outcome, "played_outcome": played_outcome})
+    return blunders
+
+def analyze_batch(args: tuple) -> list:
+    """Worker task: analyzes a batch of (game number, record) pairs and returns (game number, moves analyzed, blunders) for each"""
+    games, depth, include_humans = args
+    results = []
+    for game_number, record in games:
+        analyzed = sum(1 for ply in range(len(record.moves)) if include_humans or (record.first_player, record.second_player)[ply % 2] != "human")
+        results.append((game_number, analyzed, analyze_record(record, depth, include_humans)))
+    return results
+
+def analyze_records(records, depth: int = ANALYSIS_DEPTH, workers: int = 1, batch_size: int = ANALYSIS_BATCH_SIZE, include_humans: bool = False):
+    """Re-scores every move of a stream of records and yields (game number, moves analyzed, blunders) in game order
+
+    Batches are spread across worker processes, with only a few per worker in flight at a time, so
+    the records are consumed lazily and a file of millions of games never has to fit in memory.
+    """
+    def batches():
+        batch = []
+        for game in enumerate(records):
+            batch.append(game)
+            if len(batch) == batch_size:
+                yield batch, depth, include_humans
+                batch = []
+        if batch:
+            yield batch, depth, include_humans
+
+    if workers <= 1:
+        for batch in batches():
+            yield from analyze_batch(batch)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+        pending = deque()
+        for batch in batches():
+            pending.append(executor.submit(analyze_batch, batch))
+            if len(pending) >= 2 * workers:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+def summarize(path: str) -> dict:
+    """Counts the games, results, moves and players of a record file in one streaming pass"""
+    games = moves = 0
+    results = {"draw": 0, "X": 0, "O": 0, "unfinished": 0}
+    result_names = {DRAW: "draw", FIRST_WINS: "X", SECOND_WINS: "O", UNFINISHED: "unfinished"}
+    boards = {}
+    start = time.perf_counter()
+    for record in read_records(path):
+        games += 1
+        moves += len(record.moves)
+        results[result_names[record.result]] += 1
+        board = f"{record.board_size}x{record.board_size} win {record.win_condition}"
+        boards[board] = boards.get(board, 0) + 1
+    seconds = time.perf_counter() - start
+    return {"games": games, "moves": moves, "bytes": os.path.getsize(path), "bytes_per_game": round(os.path.getsize(path) / games, 2) if games else None,
+            "results": results, "boards": boards, "seconds": round(seconds, 3), "games_per_second": round(games / seconds) if seconds else None}
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize or analyze a binary game record file.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    summary_parser = subparsers.add_parser("summary", help="count the games, results and boards in a record file")
+    summary_parser.add_argument("path", nargs="?", default=RECORDS_PATH)
+    analyze_parser = subparsers.add_parser("analyze", help="re-score every AI move and print the blunders as JSON lines")
+    analyze_parser.add_argument("path", nargs="?", default=RECORDS_PATH)
+    analyze_parser.add_argument("--depth", type=int, default=ANALYSIS_DEPTH, help="plies searched below each move on boards without a tablebase")
+    analyze_parser.add_argument("--workers", type=int, default=multiprocessing.cpu_count())
+    analyze_parser.add_argument("--batch-size", type=int, default=ANALYSIS_BATCH_SIZE)
+    analyze_parser.add_argument("--limit", type=int, help="analyze only the first LIMIT games")
+    analyze_parser.add_argument("--include-humans", action="store_true", help="also report human players' blunders")
+    args = parser.parse_args()
+
+    if args.command == "summary":
+        print(json.dumps(summarize(args.path), indent=2))
+        return
+
+    records = read_records(args.path)
+    if args.limit is not None:
+        records = (record for _, record in zip(range(args.limit), records))
+    games = analyzed = 0
+    blunders_by_player = {}
+    start = time.perf_counter()
+    for game_number, moves_analyzed, blunders in analyze_records(records, args.depth, args.workers, args.batch_size, args.include_humans):
+        games += 1
+        analyzed += moves_analyzed
+        for blunder in blunders:
+            blunders_by_player[blunder["player"]] = blunders_by_player.get(blunder["player"], 0) + 1
+            print(json.dumps({"game": game_number, **blunder}))
+
+    # The summary goes to standard error so standard output stays pure JSON lines
+    summary = {"games": games, "moves_analyzed": analyzed, "blunders": blunders_by_player, "seconds": round(time.perf_counter() - start, 3)}
+    print(json.dumps(summary), file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,302 @@
+"""Opt-in instrumentation for the AI search: nodes and cut-offs per ply, branching factor, time split and principal variation (no GUI dependencies)
+
+Nothing here runs unless an Engine's profiling is enabled, so the normal search pays nothing for it.
+Reports can be exported as Chrome trace events (chrome://tracing, Perfetto, speedscope) or as
+collapsed stacks for flame graph tools (flamegraph.pl, speedscope).
+"""
+import argparse
+import json
+import random
+import time
+from search import Searcher, SearchTimeout, INFINITY
+
+CATEGORIES = ("evaluate", "movegen", "ordering")   # Parts of the search timed separately, through the Searcher hooks
+
+class SearchProfiler:
+    """Collects one report per AI move, with one entry per iterative deepening pass"""
+
+    def __init__(self) -> None:
+        self.origin = time.perf_counter()   # Trace timestamps count from here
+        self.moves = []        # Reports of every profiled move
+        self.current = None    # Report of the move being searched
+        self.current_pass = None
+        self.depth = -1        # Depth of the node being searched; -1 is the root
+        self.clear_levels(1)
+
+    def clear_levels(self, levels: int) -> None:
+        """Sizes the per-level scratch lists; level 0 is the root and a node at depth d is level d + 1"""
+        self.children = [0] * levels       # Distinct moves searched so far at each open node
+        self.last_child = [None] * levels  # Last move searched at each open node, to spot re-searches
+        self.best = [-INFINITY] * levels
+        self.lines = [[] for _ in range(levels)]   # Best line found so far below each open node
+        self.inclusive = [0.0] * levels    # Seconds spent in nodes at each depth, children included
+
+    def start_move(self, state) -> None:
+        """Starts the report of a new AI move for the game's current position"""
+        self.current = {"move": len(self.moves) + 1, "ply": len(state.moves), "to_move": state.to_move,
+                        "board_size": state.board_size, "win_condition": state.win_condition,
+                        "start": time.perf_counter() - self.origin, "passes": []}
+        self.moves.append(self.current)
+
+    def start_pass(self, max_depth: int) -> None:
+        """Starts recording one root search (an iterative deepening pass)"""
+        if self.current is None:
+            self.current = {"move": len(self.moves) + 1, "start": time.perf_counter() - self.origin, "passes": []}
+            self.moves.append(self.current)
+        plies = max_depth + 1
+        self.current_pass = {"max_depth": max_depth, "start": time.perf_counter() - self.origin, "completed": False,
+                             "nodes_per_ply": [0] * plies, "cutoffs_per_ply": [0] * plies, "first_move_cutoffs_per_ply": [0] * plies,
+                             "researches_per_ply": [0] * plies, "time": dict.fromkeys(CATEGORIES, 0.0)}
+        self.current_pass["time_per_ply"] = {category: [0.0] * (plies + 1) for category in CATEGORIES}   # Index 0 is the root
+        self.clear_levels(plies + 2)
+        self.depth = -1
+
+    def end_pass(self, nodes: int, best_move: tuple = None, score: int = None) -> None:
+        """Finishes the pass; best_move is None when the pass was cut short by the time budget"""
+        current_pass = self.current_pass
+        current_pass["seconds"] = time.perf_counter() - self.origin - current_pass["start"]
+        current_pass["nodes"] = nodes
+        current_pass["inclusive_per_ply"] = self.inclusive[1:-1]
+        if best_move is not None:
+            current_pass["completed"] = True
+            current_pass["best_move"] = best_move
+            current_pass["score"] = score
+            current_pass["pv"] = self.lines[0]
+
+        # Effective branching factor: how many times more nodes this pass needed than the last completed one
+        completed = [earlier for earlier in self.current["passes"] if earlier["completed"]]
+        current_pass["ebf"] = nodes / completed[-1]["nodes"] if completed and completed[-1]["nodes"] else None
+        self.current["passes"].append(current_pass)
+        self.current_pass = None
+
+    def add_time(self, category: str, seconds: float) -> None:
+        """Credits time spent in a timed function to the node being searched"""
+        if self.current_pass is not None:
+            self.current_pass["time"][category] += seconds
+            self.current_pass["time_per_ply"][category][self.depth + 1] += seconds
+
+    def open_level(self, level: int) -> None:
+        """Resets the scratch entries of a node that is about to search its moves"""
+        self.children[level] = 0
+        self.last_child[level] = None
+        self.best[level] = -INFINITY
+        self.lines[level] = []
+
+    def close_node(self, depth: int, last_move: tuple, score, beta, seconds: float) -> None:
+        """Records a finished node: a cut-off if it failed high after searching moves, and its line if it is its parent's best"""
+        level = depth + 1
+        current_pass = self.current_pass
+        self.inclusive[level] += seconds
+        searched = self.children[level]
+        if searched and score >= beta:
+            current_pass["cutoffs_per_ply"][depth] += 1
+            if searched == 1:
+                current_pass["first_move_cutoffs_per_ply"][depth] += 1
+
+        # The same move searched twice in a row at a node is a principal variation re-search with a wider window
+        parent = level - 1
+        research = last_move == self.last_child[parent]
+        if research:
+            if depth:
+                current_pass["researches_per_ply"][depth - 1] += 1
+        else:
+            self.children[parent] += 1
+            self.last_child[parent] = last_move
+        if research or -score > self.best[parent]:
+            self.best[parent] = -score
+            self.lines[parent] = [last_move] + self.lines[level]
+
+    def summary(self, report: dict) -> dict:
+        """Returns the totals of one move report: nodes, cut-offs, time split and the deepest completed pass"""
+        passes = report["passes"]
+        completed = [current_pass for current_pass in passes if current_pass["completed"]]
+        seconds = sum(current_pass["seconds"] for current_pass in passes)
+        time_split = {category: sum(current_pass["time"][category] for current_pass in passes) for category in CATEGORIES}
+        time_split["search"] = max(seconds - sum(time_split.values()), 0.0)
+        cutoffs = sum(sum(current_pass["cutoffs_per_ply"]) for current_pass in passes)
+        first_move_cutoffs = sum(sum(current_pass["first_move_cutoffs_per_ply"]) for current_pass in passes)
+        return {
+            "nodes": sum(current_pass["nodes"] for current_pass in passes),
+            "seconds": seconds,
+            "depth": completed[-1]["max_depth"] if completed else None,
+            "pv": completed[-1]["pv"] if completed else [],
+            "score": completed[-1]["score"] if completed else None,
+            "cutoffs": cutoffs,
+            "first_move_cutoff_rate": first_move_cutoffs / cutoffs if cutoffs else None,
+            "time": time_split,
+        }
+
+    def format_report(self, report: dict) -> str:
+        """Returns a move report as a readable table"""
+        summary = self.summary(report)
+        lines = [f"Move {report['move']}: {summary['nodes']:,} nodes in {summary['seconds'] * 1000:.1f} ms, depth {summary['depth']}, "
+                 f"score {summary['score']}, PV {' '.join(f'{row},{col}' for row, col in summary['pv'])}"]
+        lines.append(f"  {'depth':>5} {'nodes':>10} {'EBF':>6} {'ms':>8}  nodes per ply")
+        for current_pass in report["passes"]:
+            ebf = f"{current_pass['ebf']:.2f}" if current_pass["ebf"] is not None else "-"
+            status = "" if current_pass["completed"] else " (timed out)"
+            lines.append(f"  {current_pass['max_depth']:>5} {current_pass['nodes']:>10,} {ebf:>6} {current_pass['seconds'] * 1000:>8.1f}  "
+                         f"{' '.join(str(count) for count in current_pass['nodes_per_ply'])}{status}")
+        last = report["passes"][-1] if report["passes"] else None
+        if last is not None:
+            lines.append(f"  cut-offs per ply: {' '.join(str(count) for count in last['cutoffs_per_ply'])}"
+                         f" (first move: {' '.join(str(count) for count in last['first_move_cutoffs_per_ply'])})")
+        if summary["first_move_cutoff_rate"] is not None:
+            lines.append(f"  {summary['cutoffs']:,} cut-offs, {summary['first_move_cutoff_rate']:.0%} on the first move searched")
+        lines.append("  time: " + ", ".join(f"{category} {seconds * 1000:.1f} ms" for category, seconds in summary["time"].items()))
+        return "\n".join(lines)
+
+    def chrome_trace(self) -> dict:
+        """Returns every report as Chrome trace events: one span per move and one per pass, with the counts as arguments"""
+        events = []
+        for report in self.moves:
+            summary = self.summary(report)
+            events.append({"name": f"move {report['move']}", "cat": "move", "ph": "X", "pid": 1, "tid": 1,
+                           "ts": report["start"] * 1e6, "dur": summary["seconds"] * 1e6,
+                           "args": {key: value for key, value in summary.items() if key != "time"} | {"time_ms": {category: seconds * 1000 for category, seconds in summary["time"].items()}}})
+            for current_pass in report["passes"]:
+                events.append({"name": f"depth {current_pass['max_depth']}", "cat": "pass", "ph": "X", "pid": 1, "tid": 1,
+                               "ts": current_pass["start"] * 1e6, "dur": current_pass["seconds"] * 1e6,
+                               "args": {key: current_pass[key] for key in ("completed", "nodes", "ebf", "nodes_per_ply", "cutoffs_per_ply", "first_move_cutoffs_per_ply", "researches_per_ply")}
+                               | {"pv": current_pass.get("pv"), "score": current_pass.get("score")}})
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def collapsed_stacks(self) -> list:
+        """Returns 'frame;frame;... microseconds' lines of time per ply and category, summed over every report
+
+        Each ply's own time is its time minus that of the ply below and of the timed functions it called.
+        """
+        totals = {}
+        for report in self.moves:
+            for current_pass in report["passes"]:
+                inclusive = current_pass["inclusive_per_ply"]
+                time_per_ply = current_pass["time_per_ply"]
+                for level in range(len(inclusive) + 1):
+                    stack = ";".join(["search"] + [f"ply {depth}" for depth in range(level)])
+                    categories = {category: time_per_ply[category][level] for category in CATEGORIES}
+                    if level:
+                        below = inclusive[level] if level < len(inclusive) else 0.0
+                        own = inclusive[level - 1] - below - sum(categories.values())
+                        totals[stack] = totals.get(stack, 0.0) + max(own, 0.0)
+                    for category, seconds in categories.items():
+                        if seconds:
+                            totals[f"{stack};{category}"] = totals.get(f"{stack};{category}", 0.0) + seconds
+        return [f"{stack} {round(seconds * 1e6)}" for stack, seconds in totals.items() if round(seconds * 1e6)]
+
+    def write_chrome_trace(self, path: str) -> None:
+        """Writes the Chrome trace events to a JSON file"""
+        with open(path, "w") as file:
+            json.dump(self.chrome_trace(), file)
+
+    def write_collapsed_stacks(self, path: str) -> None:
+        """Writes the collapsed stacks to a text file"""
+        with open(path, "w") as file:
+            file.write("\n".join(self.collapsed_stacks()) + "\n")
+
+class InstrumentedSearcher(Searcher):
+    """Searcher that reports every node to a SearchProfiler; the plain Searcher is used whenever profiling is off"""
+
+    def __init__(self, profiler: SearchProfiler, transposition_table=None) -> None:
+        super().__init__(transposition_table)
+        self.profiler = profiler
+
+    def search_root(self, board, player_symbol: str, opponent_symbol: str, max_depth: int, moves: list, guess: int = None) -> tuple:
+        """Searches the root like Searcher.search_root, recording the pass in the profiler"""
+        profiler = self.profiler
+        profiler.start_pass(max_depth)
+        nodes_before = self.nodes
+        try:
+            best_move, best_score = super().search_root(board, player_symbol, opponent_symbol, max_depth, moves, guess)
+        except SearchTimeout:
+            profiler.end_pass(self.nodes - nodes_before)
+            raise
+        profiler.end_pass(self.nodes - nodes_before, best_move, best_score)
+        return best_move, best_score
+
+    def principal_variation_root(self, board, player_symbol: str, opponent_symbol: str, max_depth: int, moves: list, alpha, beta) -> tuple:
+        """Starts a fresh root line for every root window, since aspiration re-searches start over"""
+        self.profiler.open_level(0)
+        return super().principal_variation_root(board, player_symbol, opponent_symbol, max_depth, moves, alpha, beta)
+
+    def negamax(self, board, depth: int, alpha, beta, to_move: str, other: str, max_depth: int, last_move: tuple = None) -> int:
+        """Counts and times the node, then searches it with Searcher.negamax (whose recursion comes back through here)
+
+        Nodes searched outside a root search (e.g. a direct call from Game.minimax) are searched without recording.
+        """
+        profiler = self.profiler
+        if profiler.current_pass is None:
+            return super().negamax(board, depth, alpha, beta, to_move, other, max_depth, last_move)
+        profiler.current_pass["nodes_per_ply"][depth] += 1
+        profiler.open_level(depth + 1)
+        profiler.depth = depth
+        start = time.perf_counter()
+        try:
+            score = super().negamax(board, depth, alpha, beta, to_move, other, max_depth, last_move)
+        finally:
+            profiler.depth = depth - 1
+        profiler.close_node(depth, last_move, score, beta, time.perf_counter() - start)
+        return score
+
+    # The hooks below time only this searcher's calls, so other engines and threads run untouched
+    def evaluate(self, board, to_move: str, other: str) -> int:
+        """Times Searcher.evaluate as evaluation"""
+        start = time.perf_counter()
+        try:
+            return super().evaluate(board, to_move, other)
+        finally:
+            self.profiler.add_time("evaluate", time.perf_counter() - start)
+
+    def generate(self, board, to_move: str, other: str) -> list:
+        """Times Searcher.generate as move generation"""
+        start = time.perf_counter()
+        try:
+            return super().generate(board, to_move, other)
+        finally:
+            self.profiler.add_time("movegen", time.perf_counter() - start)
+
+    def order(self, board, moves: list, to_move: str, other: str, depth: int) -> list:
+        """Times Searcher.order as move ordering"""
+        start = time.perf_counter()
+        try:
+            return super().order(board, moves, to_move, other, depth)
+        finally:
+            self.profiler.add_time("ordering", time.perf_counter() - start)
+
+def main():
+    from engine import Engine, GameState, DIFFICULTY_SETTINGS
+
+    parser = argparse.ArgumentParser(description="Play a few AI moves with search instrumentation and print a report for each.")
+    parser.add_argument("--difficulty", default="hard", choices=[name for name in DIFFICULTY_SETTINGS if name not in ("easy", "mcts")])
+    parser.add_argument("--board-size", type=int, default=7)
+    parser.add_argument("--win-condition", type=int, default=4)
+    parser.add_argument("--moves", type=int, default=4, help="AI moves to profile")
+    parser.add_argument("--random-plies", type=int, default=2, help="random opening plies played first")
+    parser.add_argument("--time-budget", type=float, help="seconds per move (default: the difficulty's)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--trace", help="write Chrome trace events to this JSON file")
+    parser.add_argument("--collapsed", help="write collapsed stacks for flame graph tools to this file")
+    args = parser.parse_args()
+
+    settings = {"workers": 1, "tablebase": False}
+    if args.time_budget is not None:
+        settings["time_budget"] = args.time_budget
+    engine = Engine(args.difficulty, settings=settings)
+    profiler = engine.enable_profiling()
+    rng = random.Random(args.seed)
+    state = GameState(args.board_size, args.win_condition)
+    for _ in range(args.random_plies):
+        state.apply_move(*rng.choice(state.get_empty_spaces()))
+
+    for _ in range(args.moves):
+        if state.is_over():
+            break
+        state.apply_move(*engine.choose_move(state))
+        print(profiler.format_report(profiler.moves[-1]))
+
+    if args.trace:
+        profiler.write_chrome_trace(args.trace)
+    if args.collapsed:
+        profiler.write_collapsed_stacks(args.collapsed)
+
+if __name__ == "__main__":
+    main()
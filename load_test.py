@@ -0,0 +1,125 @@
+"""Load-test client for the game server: simulates many concurrent players against the AI and reports move latency percentiles"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from bitboard import BitBoard
+from server import GameServer
+
+PERCENTILES = (50, 90, 99)
+
+def percentile(sorted_values: list, percent: float) -> float:
+    """Returns the nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(int(round(percent / 100 * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+async def read_message(reader) -> dict:
+    """Reads one message line from the server"""
+    line = await reader.readline()
+    if not line:
+        raise ConnectionError("The server closed the connection.")
+    return json.loads(line)
+
+async def play_games(host: str, port: int, games: int, settings: dict, seed: int, latencies: list, results: dict) -> None:
+    """One simulated player: plays games as X against the AI on one connection with random legal moves
+
+    Latency is measured from sending a move until the AI's reply (or the end of the game) arrives.
+    """
+    rng = random.Random(seed)
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for _ in range(games):
+            writer.write(json.dumps({"type": "new_game", "opponent": "ai", **settings}).encode() + b"\n")
+            message = await read_message(reader)
+            if message["type"] != "game_started":
+                raise RuntimeError(f"Could not start a game: {message}")
+            game_id = message["game_id"]
+            board = BitBoard(message["board_size"], message["win_condition"])
+            free = set(range(board.board_size * board.board_size))
+
+            while True:
+                row, col = divmod(rng.choice(tuple(free)), board.board_size)
+                sent = time.perf_counter()
+                writer.write(json.dumps({"type": "move", "game_id": game_id, "row": row, "col": col}).encode() + b"\n")
+                # Our own move comes back first, then the AI's move or the end of the game
+                while True:
+                    message = await read_message(reader)
+                    if message["type"] == "move":
+                        row, col = message["row"], message["col"]
+                        board.place(row, col, message["symbol"])
+                        free.discard(board.index(row, col))
+                        if message["symbol"] == "O":
+                            break
+                    elif message["type"] in ("game_over", "error"):
+                        break
+                latencies.append(time.perf_counter() - sent)
+                if message["type"] == "move" and (board.is_win_at(row, col, "O") or not free):
+                    message = await read_message(reader)   # The AI's move ended the game
+                if message["type"] != "move":
+                    break
+
+            if message["type"] == "error":
+                results["errors"] = results.get("errors", 0) + 1
+            else:
+                outcome = message["winner"] or "draw"
+                results[outcome] = results.get(outcome, 0) + 1
+    finally:
+        writer.close()
+
+async def run_load_test(host: str, port: int, players: int, games: int, settings: dict, seed: int = 0) -> dict:
+    """Runs every simulated player at once and returns the latency percentiles (in milliseconds) and game results"""
+    latencies = []
+    results = {}
+    start = time.perf_counter()
+    outcomes = await asyncio.gather(*(play_games(host, port, games, settings, seed * 1_000_003 + player, latencies, results) for player in range(players)),
+                                    return_exceptions=True)
+    seconds = time.perf_counter() - start
+    failures = [outcome for outcome in outcomes if isinstance(outcome, Exception)]
+
+    latencies.sort()
+    report = {"players": players, "games": sum(count for outcome, count in results.items() if outcome != "errors"), "moves": len(latencies),
+              "seconds": round(seconds, 3), "moves_per_second": round(len(latencies) / seconds, 1) if seconds else None,
+              "results": results, "failed_players": len(failures)}
+    for percent in PERCENTILES:
+        value = percentile(latencies, percent)
+        report[f"p{percent}_ms"] = round(value * 1000, 2) if value is not None else None
+    report["max_ms"] = round(latencies[-1] * 1000, 2) if latencies else None
+    if failures:
+        report["first_failure"] = repr(failures[0])
+    return report
+
+async def main_async(args) -> dict:
+    settings = {"board_size": args.board_size, "win_condition": args.win_condition, "difficulty": args.difficulty, "clock": args.clock}
+    if not args.local_server:
+        return await run_load_test(args.host, args.port, args.players, args.games, settings, args.seed)
+
+    # Serve from this process on a free port, so one command measures the whole round trip
+    game_server = GameServer(args.workers)
+    server = await game_server.start(args.host, 0)
+    port = server.sockets[0].getsockname()[1]
+    try:
+        return await run_load_test(args.host, port, args.players, args.games, settings, args.seed)
+    finally:
+        await game_server.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate many concurrent players against the game server and report move latency percentiles.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--players", type=int, default=100, help="concurrent simulated players, one connection each")
+    parser.add_argument("--games", type=int, default=3, help="games each player plays in a row")
+    parser.add_argument("--board-size", type=int, default=3)
+    parser.add_argument("--win-condition", type=int, default=3)
+    parser.add_argument("--difficulty", default="easy")
+    parser.add_argument("--clock", type=float, default=300.0, help="seconds per player per game")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--local-server", action="store_true", help="start a server in this process instead of connecting to one")
+    parser.add_argument("--workers", type=int, default=None, help="AI worker processes for --local-server")
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(main_async(args)), indent=2))
+
+if __name__ == "__main__":
+    main()
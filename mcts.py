@@ -0,0 +1,274 @@
+"""Monte Carlo tree search (UCT) for large boards, with a compact array-backed node store (no GUI dependencies)"""
+import math
+import time
+from array import array
+from functools import lru_cache
+from bitboard import get_neighborhoods
+from movegen import generate_moves
+from ordering import MoveOrderer
+
+EXPLORATION = 1.4        # UCT exploration constant; higher values try less-visited moves more often
+NODE_CAPACITY = 1_000_000   # Nodes kept in the tree before it stops growing (playouts still run from its leaves)
+LOCAL_TRIES = 4          # Random playout moves redrawn up to this many times to land next to a stone
+WIDENING_BASE = 2        # Children a node considers at first; more open up as the square root of its visits grows
+
+# Outcome of the move leading into a node
+ONGOING = 0
+WON = 1
+DRAWN = 2
+
+@lru_cache(maxsize=None)
+def get_adjacent_masks(board_size: int) -> tuple:
+    """Returns, for every square, a mask of the squares touching it"""
+    return tuple(sum(1 << neighbor for neighbor in neighborhood) for neighborhood in get_neighborhoods(board_size, 1))
+
+class MonteCarloTreeSearch:
+    """UCT search tree kept between turns; each node's children sit next to each other in the node arrays"""
+
+    def __init__(self, rng, candidate_radius: int = 2, heuristic_rollouts: bool = True, capacity: int = NODE_CAPACITY) -> None:
+        self.random = rng
+        self.candidate_radius = candidate_radius       # Only squares this close to a stone become children (None for all)
+        self.heuristic_rollouts = heuristic_rollouts   # Playouts take wins and block threats instead of moving purely at random
+        self.capacity = capacity
+        self.move_orderer = MoveOrderer()   # Sorts each node's children best first, for progressive widening
+        self.root_moves = None   # Moves of the game at the root position, for re-rooting on the next turn
+        self.playouts = 0        # Playouts run by the last search
+        self.stopped = False     # Set from another thread to end the running search early (cleared by Engine.clear_cancel)
+        self.clear()
+
+    def clear(self) -> None:
+        """Drops the whole tree"""
+        self.move = array("i")          # Square index of the move leading into each node (-1 for the root)
+        self.parent = array("i")
+        self.first_child = array("i")   # Index of the node's first child, or -1 while it is unexpanded
+        self.child_count = array("i")
+        self.visits = array("i")
+        self.value = array("d")         # Summed playout results for the player who made the node's move (1 win, 0.5 draw)
+        self.outcome = array("b")
+        self.root_moves = None
+        self.add_node(-1, -1, ONGOING)
+
+    def add_node(self, move: int, parent: int, outcome: int) -> int:
+        """Appends an unexpanded, unvisited node and returns its index"""
+        self.move.append(move)
+        self.parent.append(parent)
+        self.first_child.append(-1)
+        self.child_count.append(0)
+        self.visits.append(0)
+        self.value.append(0.0)
+        self.outcome.append(outcome)
+        return len(self.move) - 1
+
+    def reroot(self, moves: list) -> None:
+        """Keeps only the subtree reached by playing moves from the root, or starts a new tree if it was never expanded"""
+        node = 0
+        for index in moves:
+            first = self.first_child[node]
+            if first < 0:
+                self.clear()
+                return
+            for child in range(first, first + self.child_count[node]):
+                if self.move[child] == index:
+                    node = child
+                    break
+            else:
+                self.clear()
+                return
+        if node == 0:
+            return
+
+        # Copy the subtree breadth first so every node's children stay contiguous in the new arrays
+        old = (self.move, self.first_child, self.child_count, self.visits, self.value, self.outcome)
+        old_move, old_first_child, old_child_count, old_visits, old_value, old_outcome = old
+        self.clear()
+        self.visits[0] = old_visits[node]
+        self.value[0] = old_value[node]
+        queue = [(node, 0)]
+        for old_node, new_node in queue:
+            first = old_first_child[old_node]
+            if first < 0:
+                continue
+            self.first_child[new_node] = len(self.move)
+            self.child_count[new_node] = old_child_count[old_node]
+            for child in range(first, first + old_child_count[old_node]):
+                new_child = self.add_node(old_move[child], new_node, old_outcome[child])
+                self.visits[new_child] = old_visits[child]
+                self.value[new_child] = old_value[child]
+                queue.append((child, new_child))
+
+    def expand(self, node: int, board, to_move: str, other: str) -> None:
+        """Adds a child for every candidate move of the side to move, recording moves that end the game"""
+        if len(self.move) >= self.capacity:
+            return
+        if self.candidate_radius is not None:
+            moves = generate_moves(board, to_move, other)
+        else:
+            moves = board.get_empty_spaces()
+        moves = self.move_orderer.order(board, moves, to_move, other)
+        empty_after = board.board_size * board.board_size - board.occupied.bit_count() - 1
+
+        self.first_child[node] = len(self.move)
+        self.child_count[node] = len(moves)
+        for row, col in moves:
+            board.place(row, col, to_move)
+            if board.is_win_at(row, col, to_move):
+                outcome = WON
+            elif not empty_after:
+                outcome = DRAWN
+            else:
+                outcome = ONGOING
+            board.remove(row, col, to_move)
+            self.add_node(row * board.board_size + col, node, outcome)
+
+    def select_child(self, node: int) -> int:
+        """Returns the child with the highest upper confidence bound, trying unvisited children first
+
+        Children are sorted best first when the node is expanded, and only the first few compete
+        until the node has been visited often enough to widen the choice (progressive widening).
+        """
+        first = self.first_child[node]
+        visits = self.visits
+        value = self.value
+        best_child = first
+        best_bound = -1.0
+        log_visits = math.log(visits[node]) if visits[node] else 0.0
+        width = min(self.child_count[node], WIDENING_BASE + math.isqrt(visits[node]))
+        for child in range(first, first + width):
+            child_visits = visits[child]
+            if not child_visits:
+                return child
+            bound = value[child] / child_visits + EXPLORATION * math.sqrt(log_visits / child_visits)
+            if bound > best_bound:
+                best_bound = bound
+                best_child = child
+        return best_child
+
+    def rollout(self, board, to_move: str, other: str):
+        """Plays the position out to the end and returns the winning symbol, or None for a draw
+
+        Wins are detected from the board's line counts. With heuristic rollouts each side takes a
+        winning square if it has one and otherwise blocks the opponent's, and random moves favour
+        squares next to a stone, where real games are decided.
+        """
+        win_condition = board.win_condition
+        win_masks = board.win_masks
+        square_lines = board.square_lines
+        counts = {to_move: board.get_line_counts(to_move), other: board.get_line_counts(other)}
+        occupied = board.occupied
+        free = [index for index in range(board.board_size * board.board_size) if not occupied >> index & 1]
+        rng = self.random
+        adjacent_masks = get_adjacent_masks(board.board_size)
+        local_tries = LOCAL_TRIES if self.heuristic_rollouts else 1
+
+        # Windows a side fills but for one square, with none of the opponent's stones
+        threats = {to_move: [], other: []}
+        if self.heuristic_rollouts:
+            for symbol, opponent in ((to_move, other), (other, to_move)):
+                own, opposing = counts[symbol], counts[opponent]
+                threats[symbol] = [line for line in range(len(win_masks)) if own[line] == win_condition - 1 and not opposing[line]]
+
+        mover, waiting = to_move, other
+        while free:
+            index = None
+            if self.heuristic_rollouts:
+                for symbol in (mover, waiting):
+                    # A threat stays live until the other side puts a stone in it
+                    blocker = waiting if symbol == mover else mover
+                    for line in threats[symbol]:
+                        if not counts[blocker][line]:
+                            index = (win_masks[line] & ~occupied).bit_length() - 1
+                            break
+                    if index is not None:
+                        break
+            if index is None:
+                for _ in range(local_tries):
+                    position = rng.randrange(len(free))
+                    index = free[position]
+                    if adjacent_masks[index] & occupied:
+                        break
+                free[position] = free[-1]
+                free.pop()
+            else:
+                free.remove(index)
+
+            occupied |= 1 << index
+            own, opposing = counts[mover], counts[waiting]
+            for line in square_lines[index]:
+                stones = own[line] + 1
+                own[line] = stones
+                if stones == win_condition:
+                    return mover
+                if stones == win_condition - 1 and not opposing[line] and self.heuristic_rollouts:
+                    threats[mover].append(line)
+            mover, waiting = waiting, mover
+        return None
+
+    def search(self, state, time_budget: float = None, playouts: int = None) -> tuple:
+        """Runs playouts from the game's position until the time budget or playout count runs out and returns the most visited move"""
+        if time_budget is None and playouts is None:
+            raise ValueError("Monte Carlo tree search needs a time budget or a playout count.")
+
+        # Reuse the subtree of the move actually played when the game continues from the last search
+        played = state.moves
+        if self.root_moves is not None and played[:len(self.root_moves)] == self.root_moves and len(played) > len(self.root_moves):
+            self.reroot([row * state.board_size + col for row, col in played[len(self.root_moves):]])
+        elif self.root_moves != played:
+            self.clear()
+        self.root_moves = list(played)
+
+        board = state.bitboard.copy()
+        if self.candidate_radius is not None:
+            board.track_nearby(self.candidate_radius)
+        board.track_lines()
+        board_size = board.board_size
+        root_symbols = (state.to_move, state.opponent)
+        deadline = time.perf_counter() + time_budget if time_budget is not None else None
+        self.playouts = 0
+
+        while playouts is None or self.playouts < playouts:
+            if not self.playouts & 15 and self.first_child[0] >= 0 and (self.stopped or deadline is not None and time.perf_counter() >= deadline):
+                break
+
+            # Selection: walk down by upper confidence bound, expanding a leaf once it has been visited
+            node = 0
+            path = [0]
+            to_move, other = root_symbols
+            while self.outcome[node] == ONGOING:
+                if self.first_child[node] < 0:
+                    if self.visits[node] or node == 0:
+                        self.expand(node, board, to_move, other)
+                    if self.first_child[node] < 0:
+                        break
+                if not self.child_count[node]:
+                    break
+                node = self.select_child(node)
+                board.place(*divmod(self.move[node], board_size), to_move)
+                path.append(node)
+                to_move, other = other, to_move
+
+            # Simulation: the result is already known if the last move ended the game
+            if self.outcome[node] == WON:
+                winner = other
+            elif self.outcome[node] == DRAWN or board.is_full():
+                winner = None
+            else:
+                winner = self.rollout(board, to_move, other)
+
+            # Backpropagation: each node is scored for the player who made its move, then the path is undone
+            for depth in range(len(path) - 1, -1, -1):
+                node = path[depth]
+                mover = root_symbols[(depth - 1) % 2]
+                self.visits[node] += 1
+                if winner is None:
+                    self.value[node] += 0.5
+                elif winner == mover:
+                    self.value[node] += 1.0
+                if depth:
+                    board.remove(*divmod(self.move[node], board_size), mover)
+            self.playouts += 1
+
+        first = self.first_child[0]
+        if first < 0 or not self.child_count[0]:
+            return None
+        best_child = max(range(first, first + self.child_count[0]), key=lambda child: self.visits[child])
+        return divmod(self.move[best_child], board_size)
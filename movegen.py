@@ -0,0 +1,83 @@
+"""Threat-space candidate move generation for the AI search (no GUI dependencies)"""
+from evaluation import get_window_table
+
+def mask_to_moves(mask: int, board_size: int) -> list:
+    """Returns the (row, col) of every set bit of a mask in row-major order"""
+    moves = []
+    while mask:
+        low_bit = mask & -mask
+        moves.append(divmod(low_bit.bit_length() - 1, board_size))
+        mask ^= low_bit
+    return moves
+
+def find_threats(board, player_symbol: str, opponent_symbol: str) -> tuple:
+    """Returns masks of (winning squares, blocking squares, double threats, opponent double threats) for player_symbol
+
+    A winning square completes a window the player already fills but for one square, and a blocking
+    square does the same for the opponent. A double threat square turns two windows into winning
+    threats at once, so the opponent cannot block both. The board's line counts (see
+    BitBoard.track_lines) give each window's stones, so only the windows holding a stone are visited
+    and the board is never rescanned.
+    """
+    board.track_lines()
+    player_bits = board.bits.get(player_symbol, 0)
+    opponent_bits = board.bits.get(opponent_symbol, 0)
+    free = board.full_mask & ~(player_bits | opponent_bits)
+    almost = board.win_condition - 1
+    building = board.win_condition - 2
+    table = get_window_table(board.board_size, board.win_condition)
+    mine_counts = board.line_counts.setdefault(player_symbol, board.new_line_counts())
+    their_counts = board.line_counts.setdefault(opponent_symbol, board.new_line_counts())
+
+    wins = blocks = 0
+    threats = double_threats = 0
+    opponent_threats = opponent_double_threats = 0
+    for line in board.active_lines:
+        count = mine_counts[line]
+        if their_counts[line]:
+            if count:
+                continue
+            count = their_counts[line]
+            if count == almost:
+                blocks |= table[line][0] & free
+            elif count == building:
+                cells = table[line][0] & free
+                opponent_double_threats |= opponent_threats & cells
+                opponent_threats |= cells
+        elif count == almost:
+            wins |= table[line][0] & free
+        elif count == building:
+            # A square already on another building window would make two threats at once
+            cells = table[line][0] & free
+            double_threats |= threats & cells
+            threats |= cells
+    return wins, blocks, double_threats, opponent_double_threats
+
+def generate_moves(board, player_symbol: str, opponent_symbol: str) -> list:
+    """Returns the candidate moves for player_symbol, most forcing first
+
+    A winning move is returned alone, and if the opponent threatens to win only the blocking moves
+    are returned, since every other move loses at once. Otherwise the candidates are the empty
+    squares near a stone (see BitBoard.track_nearby), led by double threats and then by squares
+    that stop the opponent's double threats. An empty board only gets its center square.
+    """
+    board_size = board.board_size
+    occupied = board.occupied
+    free = board.full_mask & ~occupied
+    if not free:
+        return []
+    if not occupied:
+        return [((board_size - 1) // 2, (board_size - 1) // 2)]
+
+    wins, blocks, double_threats, opponent_double_threats = find_threats(board, player_symbol, opponent_symbol)
+    if wins:
+        return mask_to_moves(wins & -wins, board_size)
+    if blocks:
+        return mask_to_moves(blocks, board_size)
+
+    candidates = free
+    if board.nearby_counts is not None and board.nearby_mask & free:
+        candidates = board.nearby_mask & free
+    opponent_double_threats &= ~double_threats
+    others = candidates & ~double_threats & ~opponent_double_threats
+    return mask_to_moves(double_threats, board_size) + mask_to_moves(opponent_double_threats, board_size) + mask_to_moves(others, board_size)
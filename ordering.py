@@ -0,0 +1,93 @@
+"""One-pass move ordering for the AI search with line-count, killer-move and history heuristics (no GUI dependencies)"""
+
+# Ordering bonuses, far enough apart that each class of move always sorts ahead of the next
+WIN_BONUS = 1 << 56             # Completes one of the mover's lines
+BLOCK_BONUS = 1 << 52           # Stops the opponent completing a line
+DOUBLE_THREAT_BONUS = 1 << 48   # Makes two winning threats at once
+KILLER_BONUSES = (1 << 40, 1 << 39)   # Quiet moves that caused a cut-off at the same ply, newest first
+LINE_BASE = 4                   # Each extra stone in an unblocked window makes the window LINE_BASE times more valuable
+
+class MoveOrderer:
+    """Scores and sorts moves in one pass over the lines through each square, at any node of the search"""
+
+    def __init__(self) -> None:
+        self.killers = []   # Two killer moves per ply below the root
+        self.history = {}   # {symbol: per-square cut-off credit}, summed over the search
+
+    def new_search(self) -> None:
+        """Forgets the killer moves and halves the history before a new AI turn, since plies now count from a new root"""
+        self.killers = []
+        for table in self.history.values():
+            for index, credit in enumerate(table):
+                table[index] = credit >> 1
+
+    def clear(self) -> None:
+        """Forgets all killer moves and history"""
+        self.killers = []
+        self.history = {}
+
+    def order(self, board, moves: list, to_move: str, other: str, depth: int = 0) -> list:
+        """Returns the moves sorted best first, scoring each from the win windows that pass through it
+
+        A move scores for every window it extends that the opponent has no stones in, and for every window
+        of the opponent's it blocks. Wins, blocks and double threats are bonused above everything else, then
+        killer moves at this ply, then squares with a history of cut-offs.
+        """
+        board.track_lines()
+        board_size = board.board_size
+        square_lines = board.square_lines
+        active_lines = board.active_lines
+        mine = board.line_counts.setdefault(to_move, board.new_line_counts())
+        theirs = board.line_counts.setdefault(other, board.new_line_counts())
+        almost = board.win_condition - 1
+        building = board.win_condition - 2
+
+        history = self.history.get(to_move)
+        if history is None:
+            history = self.history[to_move] = [0] * (board_size * board_size)
+        killers = self.killers[depth] if depth < len(self.killers) else ()
+
+        scored = []
+        for move in moves:
+            index = move[0] * board_size + move[1]
+            score = history[index]
+            threats = 0
+            for line in square_lines[index]:
+                if line not in active_lines:
+                    score += 2   # An empty window: the move would start a line of its own
+                    continue
+                own = mine[line]
+                opposing = theirs[line]
+                if not opposing:
+                    if own == almost:
+                        score += WIN_BONUS
+                    elif own == building:
+                        threats += 1
+                    score += 2 * LINE_BASE ** own
+                if not own and opposing:
+                    if opposing == almost:
+                        score += BLOCK_BONUS
+                    score += LINE_BASE ** opposing
+            if threats >= 2:
+                score += DOUBLE_THREAT_BONUS
+            if move in killers:
+                score += KILLER_BONUSES[killers.index(move)]
+            scored.append((score, move))
+
+        # Sorting on the score alone keeps equal moves in their incoming order
+        scored.sort(key=lambda item: item[0], reverse=True)
+        return [move for _, move in scored]
+
+    def record_cutoff(self, move: tuple, depth: int, remaining_depth: int, symbol: str, board_size: int) -> None:
+        """Remembers a move that caused a beta cut-off as a killer at its ply and credits its square in the history"""
+        while len(self.killers) <= depth:
+            self.killers.append([])
+        killers = self.killers[depth]
+        if move not in killers:
+            killers.insert(0, move)
+            del killers[len(KILLER_BONUSES):]
+
+        history = self.history.get(symbol)
+        if history is None:
+            history = self.history[symbol] = [0] * (board_size * board_size)
+        history[move[0] * board_size + move[1]] += remaining_depth * remaining_depth
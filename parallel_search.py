@@ -0,0 +1,218 @@
+"""Multi-process root search for the Tic Tac Toe AI using a young-brothers-wait scheme (no GUI dependencies)"""
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from bitboard import BitBoard
+from ordering import MoveOrderer
+from search import Searcher, SearchTimeout, INFINITY
+from sparse_board import SparseBoard, SPARSE_BOARD_SIZE
+
+NO_SCORE = -(1 << 62)   # Shared best score before any root move has been searched exactly
+
+NO_SEARCH = -1          # Shared search id while no root search may run, e.g. after a cancel
+
+# Per-process state, set up by initialize_worker
+_shared_best = None
+_current_search = None
+_worker_searcher = None
+_worker_search_id = None
+
+class WorkerSearcher(Searcher):
+    """Searcher for a worker process that stops once its root search is no longer the current one
+
+    The parent cancels a search by changing the shared search id, so tasks still running from a
+    cancelled or finished search stop within a few hundred nodes instead of running to their deadline.
+    """
+
+    def __init__(self, search_id: int) -> None:
+        super().__init__()
+        self.search_id = search_id
+
+    @property
+    def stopped(self) -> bool:
+        return _current_search.value != self.search_id
+
+    @stopped.setter
+    def stopped(self, value: bool) -> None:
+        pass   # Only the parent process stops worker searches
+
+def initialize_worker(shared_best, current_search) -> None:
+    """Stores the shared best-score value and the id of the current root search in each worker process"""
+    global _shared_best, _current_search
+    _shared_best = shared_best
+    _current_search = current_search
+
+def publish_score(search_id: int, score: int) -> None:
+    """Raises the shared best score if score beats it and its search is still the current one"""
+    with _shared_best.get_lock():
+        if _current_search.value == search_id and score > _shared_best.value:
+            _shared_best.value = score
+
+def search_root_move(search_id: int, encoded_board: tuple, player_symbol: str, opponent_symbol: str, max_depth: int, move: tuple, deadline: float, move_ordering: bool = False) -> tuple:
+    """Worker task: searches one root move and returns (score, is_exact, nodes), or None if the time ran out or the search was stopped
+
+    The deadline is a time.time() wall-clock time shared by every task of the root search, so tasks
+    that wait in the queue get only what is left of the budget.
+
+    The move is first tested with a null window against the best score any process has found so far.
+    Only moves that can reach that score are searched again for their exact value, so ties are
+    still resolved by root move order exactly as in the serial search.
+    """
+    global _worker_searcher, _worker_search_id
+
+    # Each worker keeps its own table for one root search; positions at the same ply share a remaining depth, so its entries stay exact
+    if _worker_search_id != search_id:
+        _worker_searcher = WorkerSearcher(search_id)
+        if move_ordering:
+            _worker_searcher.move_orderer = MoveOrderer()
+        _worker_search_id = search_id
+    searcher = _worker_searcher
+    searcher.nodes = 0
+    searcher.deadline = None
+    if deadline is not None:
+        time_left = deadline - time.time()
+        if time_left <= 0:
+            return None
+        searcher.deadline = time.perf_counter() + time_left
+    if searcher.stopped:
+        return None
+
+    board_size, win_condition, bits, radius = encoded_board
+    board_class = SparseBoard if board_size >= SPARSE_BOARD_SIZE else BitBoard
+    board = board_class.from_bits(board_size, win_condition, dict(bits))
+    if radius is not None:
+        board.track_nearby(radius)   # Branch on the same candidate moves as the serial search
+    row, col = move
+    board.place(row, col, player_symbol)
+
+    try:
+        best_so_far = _shared_best.value
+        if best_so_far != NO_SCORE:
+            # Null window just below the best score: a fail-low proves this move is strictly worse
+            score = -searcher.negamax(board, 0, -best_so_far, -(best_so_far - 1), opponent_symbol, player_symbol, max_depth, move)
+            if score < best_so_far:
+                return score, False, searcher.nodes
+            alpha = best_so_far - 1
+        else:
+            alpha = -INFINITY
+        score = -searcher.negamax(board, 0, -INFINITY, -alpha, opponent_symbol, player_symbol, max_depth, move)
+    except SearchTimeout:
+        return None
+
+    publish_score(search_id, score)
+    return score, True, searcher.nodes
+
+def encode_board(board: BitBoard) -> tuple:
+    """Returns the compact (board_size, win_condition, ((symbol, bits), ...), candidate radius) form of a bitboard"""
+    return board.board_size, board.win_condition, tuple(board.bits.items()), board.nearby_radius
+
+class ParallelSearcher:
+    """Splits the root moves across a process pool; returns the same result as Searcher at equal depth with a fresh table"""
+
+    def __init__(self, workers: int = None, move_ordering: bool = False) -> None:
+        self.workers = workers or multiprocessing.cpu_count()
+        self.move_ordering = move_ordering   # Sort moves at every node of the workers' searches
+        self.deadline = None   # perf_counter() time at which the running search must stop, or None for no limit
+        self.nodes = 0
+        self.best_score = None   # Score of the last completed root search
+        self.search_id = 0
+        self.executor = None
+        self.shared_best = None
+        self.current_search = None    # Shared id of the root search the workers may run; changing it stops them
+        self.eldest_searcher = None   # Searcher for the eldest move of the running root search
+        self._stopped = False
+
+    @property
+    def stopped(self) -> bool:
+        """Whether the running search was asked to stop"""
+        return self._stopped
+
+    @stopped.setter
+    def stopped(self, value: bool) -> None:
+        """Set from another thread to abandon the running search, here and in the worker processes"""
+        self._stopped = value
+        if value:
+            if self.eldest_searcher is not None:
+                self.eldest_searcher.stopped = True
+            if self.current_search is not None:
+                self.current_search.value = NO_SEARCH
+
+    def start(self) -> None:
+        """Starts the worker processes (spawned, so they never inherit the GUI's threads)"""
+        if self.executor is None:
+            context = multiprocessing.get_context("spawn")
+            self.shared_best = context.Value("q", NO_SCORE)
+            self.current_search = context.Value("q", NO_SEARCH)
+            self.executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=context, initializer=initialize_worker,
+                                                initargs=(self.shared_best, self.current_search))
+
+    def close(self) -> None:
+        """Stops any running tasks and shuts down the worker processes
+
+        Waits for the workers to exit, so the shared values they use stay alive until then.
+        """
+        if self.executor is not None:
+            self.current_search.value = NO_SEARCH
+            self.executor.shutdown(wait=True, cancel_futures=True)
+            self.executor = None
+
+    def search_root(self, board: BitBoard, player_symbol: str, opponent_symbol: str, max_depth: int, moves: list, guess: int = None) -> tuple:
+        """Searches the root moves and returns (best_move, best_score)
+
+        The eldest move is searched here first to get a score to prune against (young brothers wait),
+        then the remaining moves are searched in parallel. The guess is ignored because aspiration
+        windows would make the result depend on how the work was split.
+        With no moves to search (a full board) it returns (None, 0) without starting the pool.
+        """
+        if not moves:
+            self.best_score = 0
+            return None, 0
+        self.start()
+        if self._stopped:
+            raise SearchTimeout()
+        self.search_id += 1
+        self.nodes = 0
+        with self.shared_best.get_lock():
+            self.shared_best.value = NO_SCORE
+            self.current_search.value = self.search_id
+
+        # Search the eldest brother locally with a fresh table so the result does not depend on earlier searches
+        eldest_searcher = self.eldest_searcher = Searcher()
+        if self.move_ordering:
+            eldest_searcher.move_orderer = MoveOrderer()
+        eldest_searcher.deadline = self.deadline
+        eldest_searcher.stopped = self._stopped   # A stop that came in before the searcher existed
+        row, col = moves[0]
+        board.place(row, col, player_symbol)
+        try:
+            eldest_score = -eldest_searcher.negamax(board, 0, -INFINITY, INFINITY, opponent_symbol, player_symbol, max_depth, (row, col))
+        finally:
+            board.remove(row, col, player_symbol)
+            self.nodes += eldest_searcher.nodes
+        with self.shared_best.get_lock():
+            self.shared_best.value = eldest_score
+
+        # Search the young brothers in parallel, pruning against the best score any process has found
+        encoded_board = encode_board(board)
+        # Workers compare against the wall clock, since perf_counter() values mean nothing in another process
+        deadline = time.time() + (self.deadline - time.perf_counter()) if self.deadline is not None else None
+        futures = [self.executor.submit(search_root_move, self.search_id, encoded_board, player_symbol, opponent_symbol, max_depth, move, deadline, self.move_ordering) for move in moves[1:]]
+
+        best_move, best_score = moves[0], eldest_score
+        for move, future in zip(moves[1:], futures):
+            result = None if self._stopped else future.result()
+            if result is None:
+                # The time ran out or the search was stopped: drop the queued moves and stop the running ones
+                for pending in futures:
+                    pending.cancel()
+                if self.current_search.value == self.search_id:
+                    self.current_search.value = NO_SEARCH
+                raise SearchTimeout()
+            score, is_exact, nodes = result
+            self.nodes += nodes
+            # Strictly greater keeps the earliest move among equal scores, as in the serial search
+            if is_exact and score > best_score:
+                best_move, best_score = move, score
+
+        self.best_score = best_score
+        return best_move, best_score
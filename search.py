@@ -0,0 +1,192 @@
+"""Negamax alpha-beta search with principal variation search and aspiration windows (no GUI dependencies)"""
+import time
+from evaluation import evaluate_position, WIN_SCORE
+from movegen import generate_moves
+from symmetry import INVERSE_SYMMETRIES, transform_move
+from transposition import TranspositionTable, EXACT, LOWER_BOUND, UPPER_BOUND, get_side_key
+
+INFINITY = float("inf")
+ASPIRATION_WINDOW = 64   # Half-width of the first root window around the previous pass's score
+
+class SearchTimeout(Exception):
+    """Raised inside the search when the time budget for the current move runs out"""
+
+class Searcher:
+    """Runs the AI search on a BitBoard and keeps the state shared between searches"""
+
+    def __init__(self, transposition_table: TranspositionTable = None) -> None:
+        self.transposition_table = transposition_table if transposition_table is not None else TranspositionTable()
+        self.deadline = None   # perf_counter() time at which the running search must stop, or None for no limit
+        self.stopped = False   # Set from another thread to abandon the running search (cleared by Engine.clear_cancel)
+        self.nodes = 0
+        self.best_score = None   # Score of the last completed root search
+        self.move_orderer = None  # MoveOrderer that sorts the moves at every node, or None to search them as generated
+
+    def search_root(self, board, player_symbol: str, opponent_symbol: str, max_depth: int, moves: list, guess: int = None) -> tuple:
+        """Searches the root moves in order and returns (best_move, best_score)
+
+        When a guess from a shallower pass is given, the root is first searched with a narrow
+        aspiration window around it, and the window is reopened on whichever side the score falls out.
+        With no moves to search (a full board) it returns (None, 0).
+        """
+        if not moves:
+            self.best_score = 0
+            return None, 0
+        self.transposition_table.new_search()
+
+        if guess is None or abs(guess) >= WIN_SCORE:
+            alpha, beta = -INFINITY, INFINITY
+        else:
+            alpha, beta = guess - ASPIRATION_WINDOW, guess + ASPIRATION_WINDOW
+
+        while True:
+            best_move, best_score = self.principal_variation_root(board, player_symbol, opponent_symbol, max_depth, moves, alpha, beta)
+            if best_score <= alpha:
+                alpha = -INFINITY   # Failed low: the true score is below the window
+            elif best_score >= beta:
+                beta = INFINITY    # Failed high: the true score is above the window
+            else:
+                break
+
+        self.best_score = best_score
+        return best_move, best_score
+
+    def principal_variation_root(self, board, player_symbol: str, opponent_symbol: str, max_depth: int, moves: list, alpha, beta) -> tuple:
+        """Searches the first root move with the full window and the rest with null windows, tightening alpha as scores come in"""
+        best_move = None
+        best_score = -INFINITY
+
+        for index, (row, col) in enumerate(moves):
+            board.place(row, col, player_symbol)
+            if index == 0:
+                score = -self.negamax(board, 0, -beta, -alpha, opponent_symbol, player_symbol, max_depth, (row, col))
+            else:
+                # Prove the move is no better than the current best; re-search with the full window only if it is
+                score = -self.negamax(board, 0, -alpha - 1, -alpha, opponent_symbol, player_symbol, max_depth, (row, col))
+                if alpha < score < beta:
+                    score = -self.negamax(board, 0, -beta, -alpha, opponent_symbol, player_symbol, max_depth, (row, col))
+            board.remove(row, col, player_symbol)
+
+            if score > best_score:
+                best_score = score
+                best_move = (row, col)
+            alpha = max(alpha, score)
+            if alpha >= beta:
+                break
+
+        return best_move, best_score
+
+    def evaluate(self, board, to_move: str, other: str) -> int:
+        """Scores a position at the depth limit from to_move's point of view"""
+        return evaluate_position(board, to_move, other)
+
+    def generate(self, board, to_move: str, other: str) -> list:
+        """Returns the moves to search at a node: boards that track nearby squares only branch on candidate moves, most forcing first"""
+        if board.nearby_counts is not None:
+            return generate_moves(board, to_move, other)
+        return board.get_empty_spaces()
+
+    def order(self, board, moves: list, to_move: str, other: str, depth: int) -> list:
+        """Sorts a node's moves best first with the move orderer"""
+        return self.move_orderer.order(board, moves, to_move, other, depth)
+
+    def negamax(self, board, depth: int, alpha, beta, to_move: str, other: str, max_depth: int, last_move: tuple = None) -> int:
+        """Fail-soft negamax with principal variation search; scores are from to_move's point of view"""
+        # Stop the search once the time budget for this move is used up or it is cancelled (checked every 256 nodes)
+        self.nodes += 1
+        if not self.nodes & 255 and (self.stopped or self.deadline is not None and time.perf_counter() > self.deadline):
+            raise SearchTimeout()
+
+        # Base case: check if the game is over or the depth limit has been reached
+        # Wins found with more depth left (i.e. sooner) score higher, so the AI takes the quickest win and delays losses
+        win_score = WIN_SCORE + max_depth - depth
+        if last_move is not None:
+            # Only the side that just moved can have won, and only through the square it played
+            if board.is_win_at(last_move[0], last_move[1], other):
+                return -win_score
+        else:
+            if board.is_win(other):
+                return -win_score
+            if board.is_win(to_move):
+                return win_score
+
+        if depth == max_depth:
+            # Score the position heuristically instead of treating every unfinished game as a draw
+            return self.evaluate(board, to_move, other)
+
+        # Probe the transposition table before generating any moves; entries searched at least as deep
+        # can narrow the window or answer outright
+        table = self.transposition_table
+        remaining_depth = max_depth - depth
+        # Boards that track their symmetries share one entry between all symmetric positions, with moves
+        # stored as they appear in the canonical image
+        symmetry = 0
+        if board.symmetry_hashes is not None:
+            position_hash, symmetry = board.canonical_hash()
+        else:
+            position_hash = board.hash
+        key = position_hash ^ get_side_key(to_move)
+        entry = table.lookup(key)
+        hash_move = None
+        if entry is not None:
+            if entry.depth >= remaining_depth:
+                if entry.flag == EXACT:
+                    return entry.score
+                elif entry.flag == LOWER_BOUND:
+                    alpha = max(alpha, entry.score)
+                else:
+                    beta = min(beta, entry.score)
+                if alpha >= beta:
+                    return entry.score
+            hash_move = entry.best_move
+            if symmetry and hash_move is not None:
+                hash_move = transform_move(*hash_move, INVERSE_SYMMETRIES[symmetry], board.board_size)
+
+        # The node is expanded
+        empty_spaces = self.generate(board, to_move, other)
+        if not empty_spaces:
+            return 0
+        orderer = self.move_orderer
+        if orderer is not None:
+            empty_spaces = self.order(board, empty_spaces, to_move, other, depth)
+
+        # Search the stored best move first
+        if hash_move in empty_spaces:
+            empty_spaces.remove(hash_move)
+            empty_spaces.insert(0, hash_move)
+
+        alpha_original = alpha   # Window after any narrowing by the table, used to classify the result below
+
+        # Recursive case: the first move gets the full window, later moves a null window plus a re-search if they beat alpha
+        best_move = None
+        best_score = -INFINITY
+        for index, (row, col) in enumerate(empty_spaces):
+            board.place(row, col, to_move)
+            if index == 0:
+                score = -self.negamax(board, depth + 1, -beta, -alpha, other, to_move, max_depth, (row, col))
+            else:
+                score = -self.negamax(board, depth + 1, -alpha - 1, -alpha, other, to_move, max_depth, (row, col))
+                if alpha < score < beta:
+                    score = -self.negamax(board, depth + 1, -beta, -score, other, to_move, max_depth, (row, col))
+            board.remove(row, col, to_move)
+
+            if score > best_score:
+                best_score = score
+                best_move = (row, col)
+            alpha = max(alpha, score)
+            if alpha >= beta:
+                if orderer is not None:
+                    orderer.record_cutoff((row, col), depth, remaining_depth, to_move, board.board_size)
+                break  # Cut-off
+
+        # Record whether the score is exact or only a bound on the true value
+        if best_score <= alpha_original:
+            flag = UPPER_BOUND
+        elif best_score >= beta:
+            flag = LOWER_BOUND
+        else:
+            flag = EXACT
+        if symmetry:
+            best_move = transform_move(*best_move, symmetry, board.board_size)
+        table.store(key, remaining_depth, best_score, flag, best_move)
+        return best_score
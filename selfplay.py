@@ -0,0 +1,189 @@
+"""Headless batch self-play: plays many AI-vs-AI games across worker processes and streams the results as JSON lines"""
+import argparse
+import json
+import multiprocessing
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from engine import GameState, Engine, PlayerStatistics, DIFFICULTY_SETTINGS
+from game_records import GameRecordWriter
+from statistics_store import StatisticsStore, STATISTICS_PATH, DRAW, FIRST_WINS, SECOND_WINS
+
+# Engines are kept per worker process so their transposition tables carry over from game to game
+_engines = {}
+
+def parse_engine_spec(spec: str) -> tuple:
+    """Parses 'difficulty' or 'difficulty:key=value,...' into (difficulty, settings overrides)
+
+    For example 'hard:max_depth=3,time_budget=none' is the Hard AI searching exactly 3 plies
+    below each root move with no time limit.
+    """
+    difficulty, _, options = spec.partition(":")
+    if difficulty not in DIFFICULTY_SETTINGS:
+        raise ValueError(f"Unknown difficulty '{difficulty}'.")
+
+    settings = {}
+    for option in filter(None, options.split(",")):
+        key, _, value = option.partition("=")
+        if key not in DIFFICULTY_SETTINGS[difficulty]:
+            raise ValueError(f"Unknown setting '{key}'.")
+        if value.lower() == "none":
+            settings[key] = None
+        elif value.lower() in ("true", "false"):
+            settings[key] = value.lower() == "true"
+        else:
+            settings[key] = float(value) if "." in value else int(value)
+    return difficulty, settings
+
+def get_engine(spec: str) -> Engine:
+    """Returns this process's engine for an engine spec"""
+    if spec not in _engines:
+        difficulty, settings = parse_engine_spec(spec)
+        _engines[spec] = Engine(difficulty, settings=settings)
+    return _engines[spec]
+
+def play_game(first_spec: str, second_spec: str, board_size: int, win_condition: int, seed: int, random_plies: int = 0) -> dict:
+    """Plays one game between two engine specs and returns its record"""
+    rng = random.Random(seed)
+    engines = {"X": get_engine(first_spec), "O": get_engine(second_spec)}
+    for engine in engines.values():
+        engine.random.seed(rng.getrandbits(32))   # Easy moves are random, so reseed them per game for reproducible runs
+
+    state = GameState(board_size, win_condition)
+    think_times = {"X": 0.0, "O": 0.0}
+    while not state.is_over():
+        symbol = state.to_move
+        if len(state.moves) < random_plies:
+            # Random opening plies so that deterministic engines do not replay the same game
+            move = rng.choice(state.get_empty_spaces())
+        else:
+            start = time.perf_counter()
+            move = engines[symbol].choose_move(state)
+            think_times[symbol] += time.perf_counter() - start
+        state.apply_move(*move)
+
+    return {
+        "seed": seed,
+        "x": first_spec,
+        "o": second_spec,
+        "winner": state.winner,
+        "moves": [row * board_size + col for row, col in state.moves],
+        "think_time": {symbol: round(seconds, 6) for symbol, seconds in think_times.items()},
+    }
+
+def play_batch(args: tuple) -> list:
+    """Worker task: plays one batch of games and returns their records"""
+    first_spec, second_spec, board_size, win_condition, seeds, random_plies, alternate = args
+    records = []
+    for game_number, seed in seeds:
+        # With alternate colors, every other game swaps which engine moves first
+        swapped = alternate and game_number % 2 == 1
+        x_spec, o_spec = (second_spec, first_spec) if swapped else (first_spec, second_spec)
+        record = play_game(x_spec, o_spec, board_size, win_condition, seed, random_plies)
+        record["game"] = game_number
+        record["swapped"] = swapped
+        records.append(record)
+    return records
+
+def record_result(statistics: PlayerStatistics, record: dict, names: tuple) -> None:
+    """Adds one game record to win/loss/draw statistics keyed by player name"""
+    first_name, second_name = names
+    x_name, o_name = (second_name, first_name) if record["swapped"] else (first_name, second_name)
+    if record["winner"] is None:
+        statistics.record_draw(x_name)
+        statistics.record_draw(o_name)
+    else:
+        winner, loser = (x_name, o_name) if record["winner"] == "X" else (o_name, x_name)
+        statistics.record_win(winner)
+        statistics.record_loss(loser)
+
+def store_result(store: StatisticsStore, record: dict, names: tuple, board_size: int, win_condition: int) -> None:
+    """Queues one game record in the statistics database, under the same player names as record_result"""
+    first_name, second_name = names
+    x_name, o_name = (second_name, first_name) if record["swapped"] else (first_name, second_name)
+    result = {None: DRAW, "X": FIRST_WINS, "O": SECOND_WINS}[record["winner"]]
+    think_time = record["think_time"]
+    store.record_game(board_size, win_condition, None, x_name, o_name, result, len(record["moves"]), (think_time["X"], think_time["O"]))
+
+def run_selfplay(first_spec: str, second_spec: str, games: int, board_size: int, win_condition: int, workers: int = 1,
+                 batch_size: int = 100, seed: int = 0, random_plies: int = 0, alternate: bool = False, output=None, store: StatisticsStore = None,
+                 record_writer: GameRecordWriter = None) -> PlayerStatistics:
+    """Plays the games, writes each record to output as a JSON line in game order (and to store and record_writer if given), and returns the aggregate statistics"""
+    names = (f"A: {first_spec}", f"B: {second_spec}")
+    statistics = PlayerStatistics()
+    seeds = [(game_number, seed * 1_000_003 + game_number) for game_number in range(games)]
+    batches = [(first_spec, second_spec, board_size, win_condition, seeds[start:start + batch_size], random_plies, alternate)
+               for start in range(0, games, batch_size)]
+
+    def consume(records: list) -> None:
+        for record in records:
+            record_result(statistics, record, names)
+            if store is not None:
+                store_result(store, record, names, board_size, win_condition)
+            if record_writer is not None:
+                result = {None: DRAW, "X": FIRST_WINS, "O": SECOND_WINS}[record["winner"]]
+                record_writer.write(board_size, win_condition, record["x"], record["o"], result, record["moves"])
+            if output is not None:
+                output.write(json.dumps(record) + "\n")
+        if output is not None:
+            output.flush()
+        if record_writer is not None:
+            record_writer.flush()
+
+    if workers <= 1:
+        for batch in batches:
+            consume(play_batch(batch))
+    else:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+            for records in executor.map(play_batch, batches):
+                consume(records)
+
+    return statistics
+
+def main():
+    parser = argparse.ArgumentParser(description="Play AI-vs-AI Tic Tac Toe games headlessly and stream the results as JSON lines.")
+    parser.add_argument("first", help="engine that moves first, e.g. 'hard' or 'very_hard:max_depth=3,time_budget=none'")
+    parser.add_argument("second", help="engine that moves second")
+    parser.add_argument("-n", "--games", type=int, default=100, help="number of games to play")
+    parser.add_argument("--board-size", type=int, default=3)
+    parser.add_argument("--win-condition", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=multiprocessing.cpu_count(), help="worker processes (1 plays in this process)")
+    parser.add_argument("--batch-size", type=int, default=100, help="games handed to a worker at a time")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--random-plies", type=int, default=0, help="random opening plies played before the engines take over")
+    parser.add_argument("--alternate", action="store_true", help="swap which engine moves first every other game")
+    parser.add_argument("-o", "--output", help="file for the JSON lines (default: standard output)")
+    parser.add_argument("--records", help="also append every game to this binary game record file (see game_records.py)")
+    parser.add_argument("--stats", nargs="?", const=STATISTICS_PATH, help="also record every game in a statistics database (default: the GUI's statistics.db)")
+    args = parser.parse_args()
+
+    if not 3 <= args.win_condition <= args.board_size:
+        parser.error("Win condition must be between 3 and the board size.")
+    for spec in (args.first, args.second):
+        try:
+            parse_engine_spec(spec)
+        except ValueError as error:
+            parser.error(str(error))
+
+    output = open(args.output, "w") if args.output else sys.stdout
+    store = StatisticsStore(args.stats) if args.stats else None
+    record_writer = GameRecordWriter(args.records) if args.records else None
+    start = time.perf_counter()
+    try:
+        statistics = run_selfplay(args.first, args.second, args.games, args.board_size, args.win_condition, args.workers,
+                                  args.batch_size, args.seed, args.random_plies, args.alternate, output, store, record_writer)
+    finally:
+        if args.output:
+            output.close()
+        if store is not None:
+            store.close()
+        if record_writer is not None:
+            record_writer.close()
+
+    # The summary goes to standard error so standard output stays pure JSON lines
+    summary = {"games": args.games, "seconds": round(time.perf_counter() - start, 3), "statistics": statistics.statistics}
+    print(json.dumps(summary), file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
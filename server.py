@@ -0,0 +1,325 @@
+"""Asyncio game server: many concurrent human-vs-AI and human-vs-human matches over TCP with a line-delimited JSON protocol
+
+Each line a client sends is one JSON object with a "type":
+    {"type": "new_game", "board_size": 3, "win_condition": 3, "opponent": "ai", "difficulty": "hard", "clock": 300, "increment": 0, "ai_first": false}
+    {"type": "new_game", "opponent": "human", ...}   answered with "waiting"; a second client then sends "join"
+    {"type": "join", "game_id": 7}
+    {"type": "move", "game_id": 7, "row": 1, "col": 1}
+    {"type": "resign", "game_id": 7}
+The server answers with "game_started", "waiting", "move" (sent to both players for every move, with both clocks),
+"game_over" (winner symbol or null, and the reason: line, draw, time, resign, disconnect or error) and "error" messages.
+AI moves are searched in a bounded process pool so they never block the event loop.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from sparse_board import new_board
+from engine import Engine, GameState, DIFFICULTY_SETTINGS
+
+SYMBOLS = ("X", "O")
+MAX_BOARD_SIZE = 19        # Largest board accepted, the 19x19 of five in a row
+DEFAULT_CLOCK = 300.0      # Seconds each player gets for the whole game
+AI_CLOCK_SHARE = 20        # The AI spends at most this fraction (1/AI_CLOCK_SHARE) of its remaining clock on one move
+MAX_PENDING_AI_MOVES = 256 # AI searches queued or running at once; further AI turns wait for a slot
+MAX_LINE = 64 * 1024       # Longest message line accepted from a client
+
+logger = logging.getLogger(__name__)
+
+# Engines are kept per worker process, one per difficulty and board, so their tables carry over between matches
+_engines = {}
+
+def choose_ai_move(difficulty: str, board_size: int, win_condition: int, moves: bytes, time_budget: float) -> tuple:
+    """Worker task: replays a match's moves and returns the AI's move for the side to move"""
+    key = (difficulty, board_size, win_condition)
+    engine = _engines.get(key)
+    if engine is None:
+        engine = _engines[key] = Engine(difficulty, settings={"workers": 1})
+    engine.settings["time_budget"] = time_budget
+    state = GameState(board_size, win_condition)
+    for index in array("H", moves):
+        state.apply_move(*divmod(index, board_size))
+    return engine.choose_move(state)
+
+class Match:
+    """Compact state of one match: a bitboard, the moves as cell indices and the two clocks"""
+    __slots__ = ("game_id", "board", "moves", "players", "difficulty", "clocks", "increment", "turn_start", "timer", "over")
+
+    def __init__(self, game_id: int, board_size: int, win_condition: int, players: list, difficulty: str, clock: float, increment: float) -> None:
+        self.game_id = game_id
+        self.board = new_board(board_size, win_condition, SYMBOLS)
+        self.moves = array("H")       # Cell index of every move, in order
+        self.players = players        # Connection playing X and O, or None for the AI
+        self.difficulty = difficulty  # AI difficulty, or None for human-vs-human
+        self.clocks = [clock, clock]  # Seconds left for X and O
+        self.increment = increment    # Seconds added to a player's clock after each of their moves
+        self.turn_start = None        # Event loop time at which the side to move started thinking
+        self.timer = None             # Handle that ends the game when the side to move runs out of time
+        self.over = False
+
+    @property
+    def to_move(self) -> int:
+        """Index (0 for X, 1 for O) of the side to move"""
+        return len(self.moves) % 2
+
+class Connection:
+    """One client socket and the matches it plays in"""
+    __slots__ = ("writer", "game_ids")
+
+    def __init__(self, writer) -> None:
+        self.writer = writer
+        self.game_ids = set()
+
+    def send(self, message: dict) -> None:
+        """Queues one message line; the client's read loop waits for the buffer to drain"""
+        if not self.writer.is_closing():
+            self.writer.write(json.dumps(message).encode() + b"\n")
+
+class GameServer:
+    """Keeps every match in memory and runs the AI turns in a process pool"""
+
+    def __init__(self, workers: int = None, max_pending: int = MAX_PENDING_AI_MOVES) -> None:
+        self.workers = workers or multiprocessing.cpu_count()
+        self.max_pending = max_pending
+        self.matches = {}       # {game_id: Match} of matches still being played or waiting for a second player
+        self.next_game_id = 1
+        self.executor = None
+        self.ai_slots = None    # Semaphore bounding the AI searches queued on the pool
+        self.server = None
+        self.tasks = set()      # Running AI turns, referenced here so they are not garbage-collected mid-search
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8765):
+        """Starts the worker processes and begins accepting clients; returns the asyncio server"""
+        self.executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+        self.ai_slots = asyncio.Semaphore(self.max_pending)
+        self.server = await asyncio.start_server(self.handle_client, host, port, limit=MAX_LINE)
+        return self.server
+
+    async def close(self) -> None:
+        """Stops accepting clients and shuts down the worker processes"""
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
+    async def handle_client(self, reader, writer) -> None:
+        """Reads one client's messages until it disconnects"""
+        connection = Connection(writer)
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (ConnectionError, ValueError):   # ValueError: a line longer than MAX_LINE
+                    break
+                if not line:
+                    break
+                try:
+                    message = json.loads(line)
+                    if not isinstance(message, dict):
+                        raise ValueError("A message must be a JSON object.")
+                    self.dispatch(connection, message)
+                except (ValueError, KeyError, TypeError) as error:
+                    connection.send({"type": "error", "message": str(error)})
+                try:
+                    await writer.drain()
+                except (ConnectionError, ValueError):   # The client went away while the replies were being flushed
+                    break
+        finally:
+            for game_id in list(connection.game_ids):
+                match = self.matches.get(game_id)
+                if match is not None:
+                    # The player who left loses a human-vs-human match being played; an AI match or one still waiting is simply dropped
+                    side = match.players.index(connection)
+                    playing = match.difficulty is None and None not in match.players
+                    self.end_match(match, SYMBOLS[1 - side] if playing else None, "disconnect")
+            writer.close()
+
+    def dispatch(self, connection: Connection, message: dict) -> None:
+        """Handles one client message"""
+        kind = message.get("type")
+        if kind == "new_game":
+            self.new_game(connection, message)
+        elif kind == "join":
+            self.join_game(connection, self.get_match(message))
+        elif kind == "move":
+            self.play_move(connection, self.get_match(message), int(message["row"]), int(message["col"]))
+        elif kind == "resign":
+            match = self.get_match(message)
+            if connection not in match.players:
+                raise ValueError("You are not playing in this game.")
+            self.end_match(match, SYMBOLS[1 - match.players.index(connection)], "resign")
+        else:
+            raise ValueError(f"Unknown message type '{kind}'.")
+
+    def get_match(self, message: dict) -> Match:
+        """Returns the match a message refers to"""
+        match = self.matches.get(message.get("game_id"))
+        if match is None:
+            raise ValueError("No such game.")
+        return match
+
+    def new_game(self, connection: Connection, message: dict) -> None:
+        """Creates a match against the AI, or a human-vs-human match that waits for a second player"""
+        board_size = int(message.get("board_size", 3))
+        win_condition = int(message.get("win_condition", board_size))
+        if not 3 <= board_size <= MAX_BOARD_SIZE:
+            raise ValueError(f"Board size must be between 3 and {MAX_BOARD_SIZE}.")
+        if not 3 <= win_condition <= board_size:
+            raise ValueError("Win condition must be between 3 and the board size.")
+        clock = float(message.get("clock", DEFAULT_CLOCK))
+        increment = float(message.get("increment", 0.0))
+        if clock <= 0 or increment < 0:
+            raise ValueError("The clock must be positive and the increment not negative.")
+
+        game_id = self.next_game_id
+        self.next_game_id += 1
+        if message.get("opponent", "ai") == "ai":
+            difficulty = message.get("difficulty", "hard")
+            if difficulty not in DIFFICULTY_SETTINGS:
+                raise ValueError(f"Unknown difficulty '{difficulty}'.")
+            players = [None, connection] if message.get("ai_first") else [connection, None]
+            match = Match(game_id, board_size, win_condition, players, difficulty, clock, increment)
+            self.matches[game_id] = match
+            connection.game_ids.add(game_id)
+            self.start_match(match)
+        else:
+            match = Match(game_id, board_size, win_condition, [connection, None], None, clock, increment)
+            self.matches[game_id] = match
+            connection.game_ids.add(game_id)
+            connection.send({"type": "waiting", "game_id": game_id})
+
+    def join_game(self, connection: Connection, match: Match) -> None:
+        """Seats a second player in a waiting human-vs-human match and starts it"""
+        if match.difficulty is not None or match.players[1] is not None:
+            raise ValueError("This game cannot be joined.")
+        if match.players[0] is connection:
+            raise ValueError("You cannot play against yourself.")
+        match.players[1] = connection
+        connection.game_ids.add(match.game_id)
+        self.start_match(match)
+
+    def start_match(self, match: Match) -> None:
+        """Tells both players the game has started and starts X's clock"""
+        for side, player in enumerate(match.players):
+            if player is not None:
+                player.send({"type": "game_started", "game_id": match.game_id, "symbol": SYMBOLS[side], "board_size": match.board.board_size,
+                             "win_condition": match.board.win_condition, "clocks": match.clocks})
+        self.start_turn(match)
+
+    def start_turn(self, match: Match) -> None:
+        """Starts the clock of the side to move, and the AI's search if it is the AI's turn"""
+        loop = asyncio.get_running_loop()
+        side = match.to_move
+        match.turn_start = loop.time()
+        match.timer = loop.call_later(match.clocks[side], self.flag, match, len(match.moves))
+        if match.players[side] is None:
+            task = asyncio.create_task(self.ai_move(match))
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+
+    def flag(self, match: Match, ply: int) -> None:
+        """Ends the match when the side to move runs out of time"""
+        if not match.over and len(match.moves) == ply:
+            match.clocks[match.to_move] = 0.0
+            self.end_match(match, SYMBOLS[1 - match.to_move], "time")
+
+    async def ai_move(self, match: Match) -> None:
+        """Searches the AI's move in the process pool and plays it, unless the match ended in the meantime"""
+        ply = len(match.moves)
+        board = match.board
+        settings = DIFFICULTY_SETTINGS[match.difficulty]
+        async with self.ai_slots:
+            if match.over:
+                return
+            # The AI never spends more than its difficulty allows, nor more than a share of its remaining clock
+            remaining = match.clocks[match.to_move] - (asyncio.get_running_loop().time() - match.turn_start)
+            time_budget = max(min(settings["time_budget"], remaining / AI_CLOCK_SHARE), 0.0)
+            try:
+                move = await asyncio.get_running_loop().run_in_executor(
+                    self.executor, choose_ai_move, match.difficulty, board.board_size, board.win_condition, match.moves.tobytes(), time_budget)
+            except Exception:
+                # A failed search must not leave the player waiting for a move that never comes
+                logger.exception("AI search failed in game %d", match.game_id)
+                self.end_match(match, None, "error")
+                return
+        if not match.over and len(match.moves) == ply and move is not None:
+            self.apply_move(match, *move)
+
+    def play_move(self, connection: Connection, match: Match, row: int, col: int) -> None:
+        """Plays a human player's move after checking that it is theirs to make and legal"""
+        if match.over or (match.difficulty is None and None in match.players):
+            raise ValueError("This game is not being played.")
+        if match.players[match.to_move] is not connection:
+            raise ValueError("It is not your turn.")
+        board = match.board
+        if not (0 <= row < board.board_size and 0 <= col < board.board_size) or board.occupied >> board.index(row, col) & 1:
+            raise ValueError(f"Invalid move ({row}, {col}).")
+        self.apply_move(match, row, col)
+
+    def apply_move(self, match: Match, row: int, col: int) -> None:
+        """Charges the mover's clock, plays the move, tells both players and starts the next turn or ends the match"""
+        side = match.to_move
+        match.timer.cancel()
+        match.clocks[side] -= asyncio.get_running_loop().time() - match.turn_start
+        if match.clocks[side] <= 0:
+            match.clocks[side] = 0.0
+            self.end_match(match, SYMBOLS[1 - side], "time")
+            return
+        match.clocks[side] += match.increment
+
+        board = match.board
+        symbol = SYMBOLS[side]
+        board.place(row, col, symbol)
+        match.moves.append(board.index(row, col))
+        for player in match.players:
+            if player is not None:
+                player.send({"type": "move", "game_id": match.game_id, "row": row, "col": col, "symbol": symbol, "clocks": match.clocks})
+
+        if board.is_win_at(row, col, symbol):
+            self.end_match(match, symbol, "line")
+        elif board.is_full():
+            self.end_match(match, None, "draw")
+        else:
+            self.start_turn(match)
+
+    def end_match(self, match: Match, winner: str, reason: str) -> None:
+        """Tells both players the result and forgets the match"""
+        if match.over:
+            return
+        match.over = True
+        if match.timer is not None:
+            match.timer.cancel()
+        for player in match.players:
+            if player is not None:
+                player.send({"type": "game_over", "game_id": match.game_id, "winner": winner, "reason": reason, "moves": len(match.moves)})
+                player.game_ids.discard(match.game_id)
+        del self.matches[match.game_id]
+
+async def serve(host: str, port: int, workers: int, max_pending: int) -> None:
+    """Runs the game server until it is interrupted"""
+    game_server = GameServer(workers, max_pending)
+    server = await game_server.start(host, port)
+    print(f"Serving on {', '.join(str(socket.getsockname()) for socket in server.sockets)}")
+    try:
+        await server.serve_forever()
+    finally:
+        await game_server.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve Tic Tac Toe matches over TCP with a line-delimited JSON protocol.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=multiprocessing.cpu_count(), help="processes searching AI moves")
+    parser.add_argument("--max-pending", type=int, default=MAX_PENDING_AI_MOVES, help="AI searches queued or running at once")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, args.workers, args.max_pending))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Sparse board for gomoku-scale games such as 15x15 and 19x19 five in a row (no GUI dependencies)"""
+from bitboard import BitBoard
+
+SPARSE_BOARD_SIZE = 9        # Boards at least this wide use a SparseBoard
+SPARSE_CANDIDATE_RADIUS = 1  # Widest candidate radius searched on a SparseBoard, where radius 2 leaves too many moves to search deeply
+
+class SparseBoard(BitBoard):
+    """Board whose per-window state holds only the win windows that have a stone in them
+
+    The stones themselves are the per-symbol bitmasks of BitBoard, whose set bits are exactly the
+    occupied squares. A plain BitBoard that tracks its lines keeps a count for every win window of
+    the board; a sparse board always tracks its lines (see BitBoard.track_lines), but as
+    {window: stones} dicts holding only the active windows, each with an entry for every symbol.
+    On a large board almost every window is empty, so the evaluation, threat detection and move
+    ordering, which look up only the active windows, and copying the board cost time in proportion
+    to the stones rather than to the board's area.
+    """
+
+    def __init__(self, board_size: int, win_condition: int, symbols: tuple = ("X", "O")) -> None:
+        super().__init__(board_size, win_condition, symbols)
+        self.track_lines()
+
+    def get_line_counts(self, symbol: str) -> list:
+        """Returns a copy of symbol's stone count in every win window, as a list in get_win_masks order"""
+        counts = [0] * len(self.win_masks)
+        for line, count in self.line_counts[symbol].items():
+            counts[line] = count
+        return counts
+
+    def new_line_counts(self) -> dict:
+        """Returns the stone counts of a symbol with no stones: a zero for every active window"""
+        return dict.fromkeys(self.active_lines, 0)
+
+    def update_lines(self, index: int, symbol: str, delta: int) -> None:
+        """Adds delta stones of symbol to every win window through square index
+
+        A window gets an entry for every symbol with its first stone, and loses them all with its last.
+        """
+        line_counts = self.line_counts
+        counts = line_counts.get(symbol)
+        if counts is None:
+            counts = line_counts[symbol] = self.new_line_counts()
+        active_lines = self.active_lines
+        for line in self.square_lines[index]:
+            stones = active_lines.get(line, 0) + delta
+            if not stones:
+                del active_lines[line]
+                for symbol_counts in line_counts.values():
+                    del symbol_counts[line]
+                continue
+            if line not in active_lines:
+                for symbol_counts in line_counts.values():
+                    symbol_counts[line] = 0
+            active_lines[line] = stones
+            counts[line] += delta
+
+def new_board(board_size: int, win_condition: int, symbols: tuple = ("X", "O")) -> BitBoard:
+    """Returns an empty board of the given size: a SparseBoard for gomoku-scale boards and a BitBoard otherwise"""
+    if board_size >= SPARSE_BOARD_SIZE:
+        return SparseBoard(board_size, win_condition, symbols)
+    return BitBoard(board_size, win_condition, symbols)
@@ -0,0 +1,156 @@
+"""Persistent per-game statistics in SQLite (WAL mode), safe for batched writes from many threads and processes (no GUI dependencies)"""
+import argparse
+import json
+import os
+import sqlite3
+import threading
+import time
+
+STATISTICS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "statistics.db")
+BATCH_SIZE = 256       # Games buffered in memory before they are written in one transaction
+BUSY_TIMEOUT = 30.0    # Seconds a writer waits for another process's transaction to finish
+
+# Result of a game, from the first player's point of view
+DRAW = 0
+FIRST_WINS = 1
+SECOND_WINS = 2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    id INTEGER PRIMARY KEY,
+    played_at REAL NOT NULL,
+    board_size INTEGER NOT NULL,
+    win_condition INTEGER NOT NULL,
+    difficulty TEXT,
+    first_player TEXT NOT NULL,
+    second_player TEXT NOT NULL,
+    result INTEGER NOT NULL,
+    move_count INTEGER NOT NULL,
+    first_think_time REAL NOT NULL,
+    second_think_time REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS games_by_first_player ON games (first_player, result);
+CREATE INDEX IF NOT EXISTS games_by_second_player ON games (second_player, result);
+CREATE INDEX IF NOT EXISTS games_by_rules ON games (board_size, win_condition, difficulty);
+"""
+
+# Wins, losses and draws of one player; each half of the union is answered from one of the player indexes
+PLAYER_RESULTS = """
+SELECT result = ?, result = ?, COUNT(*) FROM games WHERE first_player = ? GROUP BY result
+UNION ALL
+SELECT result = ?, result = ?, COUNT(*) FROM games WHERE second_player = ? GROUP BY result
+"""
+
+class StatisticsStore:
+    """Appends finished games to an SQLite database and answers win/loss/draw queries over all of them
+
+    Games are buffered and written batch_size at a time in one transaction. The database runs in
+    write-ahead-log mode, so readers never block the writer and several processes (the GUI and
+    self-play runs) can share one file.
+    """
+
+    def __init__(self, path: str = STATISTICS_PATH, batch_size: int = BATCH_SIZE) -> None:
+        self.path = path
+        self.batch_size = batch_size
+        self.pending = []              # Rows not yet written
+        self.lock = threading.Lock()   # Guards pending and the connection, which is shared between threads
+        # Autocommit mode, so flush controls its transactions explicitly
+        self.connection = sqlite3.connect(path, timeout=BUSY_TIMEOUT, isolation_level=None, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")   # In WAL mode a commit survives a crash of the program, only not of the OS
+        self.connection.executescript(SCHEMA)
+
+    def record_game(self, board_size: int, win_condition: int, difficulty: str, first_player: str, second_player: str,
+                    result: int, move_count: int, think_times: tuple = (0.0, 0.0)) -> None:
+        """Queues one finished game; result is DRAW, FIRST_WINS or SECOND_WINS and think_times holds each player's total seconds"""
+        row = (time.time(), board_size, win_condition, difficulty, first_player, second_player, result, move_count, think_times[0], think_times[1])
+        with self.lock:
+            self.pending.append(row)
+            if len(self.pending) >= self.batch_size:
+                self.write_pending()
+
+    def flush(self) -> None:
+        """Writes every queued game to the database"""
+        with self.lock:
+            self.write_pending()
+
+    def write_pending(self) -> None:
+        """Writes the queued games in one transaction (the caller holds the lock)"""
+        if not self.pending:
+            return
+        # BEGIN IMMEDIATE takes the write lock up front, so concurrent writers wait their turn instead of failing mid-transaction
+        self.connection.execute("BEGIN IMMEDIATE")
+        try:
+            self.connection.executemany(
+                "INSERT INTO games (played_at, board_size, win_condition, difficulty, first_player, second_player, result, move_count,"
+                " first_think_time, second_think_time) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", self.pending)
+        except BaseException:
+            self.connection.execute("ROLLBACK")
+            raise
+        self.connection.execute("COMMIT")
+        self.pending = []
+
+    def get_player_stats(self, player_name: str) -> dict:
+        """Returns the wins, losses and draws of a player over every stored game"""
+        stats = {"wins": 0, "losses": 0, "draws": 0}
+        with self.lock:
+            self.write_pending()   # Include this process's own queued games
+            rows = self.connection.execute(PLAYER_RESULTS, (FIRST_WINS, SECOND_WINS, player_name, SECOND_WINS, FIRST_WINS, player_name)).fetchall()
+        for won, lost, count in rows:
+            if won:
+                stats["wins"] += count
+            elif lost:
+                stats["losses"] += count
+            else:
+                stats["draws"] += count
+        return stats
+
+    def get_average_think_time(self, player_name: str) -> float:
+        """Returns a player's average seconds per move over every stored game, or None if they have no moves"""
+        with self.lock:
+            self.write_pending()
+            seconds, moves = self.connection.execute(
+                "SELECT SUM(seconds), SUM(moves) FROM ("
+                " SELECT SUM(first_think_time) AS seconds, SUM((move_count + 1) / 2) AS moves FROM games WHERE first_player = ?"
+                " UNION ALL"
+                " SELECT SUM(second_think_time), SUM(move_count / 2) FROM games WHERE second_player = ?)", (player_name, player_name)).fetchone()
+        return seconds / moves if moves else None
+
+    def get_player_names(self) -> list:
+        """Returns the name of every player with a stored game, in alphabetical order"""
+        with self.lock:
+            self.write_pending()
+            rows = self.connection.execute("SELECT DISTINCT first_player FROM games UNION SELECT DISTINCT second_player FROM games ORDER BY 1").fetchall()
+        return [name for name, in rows]
+
+    def get_rules_summary(self) -> list:
+        """Returns (board_size, win_condition, difficulty, games, first player wins, second player wins, draws) for every set of rules played"""
+        with self.lock:
+            self.write_pending()
+            return self.connection.execute(
+                "SELECT board_size, win_condition, difficulty, COUNT(*), SUM(result = ?), SUM(result = ?), SUM(result = ?) FROM games"
+                " GROUP BY board_size, win_condition, difficulty ORDER BY board_size, win_condition, difficulty", (FIRST_WINS, SECOND_WINS, DRAW)).fetchall()
+
+    def close(self) -> None:
+        """Writes any queued games and closes the database"""
+        with self.lock:
+            self.write_pending()
+            self.connection.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Print the stored game statistics as JSON.")
+    parser.add_argument("--path", default=STATISTICS_PATH, help="statistics database (default: statistics.db next to this file)")
+    args = parser.parse_args()
+
+    store = StatisticsStore(args.path)
+    try:
+        players = {name: dict(store.get_player_stats(name), average_think_time=store.get_average_think_time(name)) for name in store.get_player_names()}
+        rules = [{"board_size": board_size, "win_condition": win_condition, "difficulty": difficulty, "games": games,
+                  "first_player_wins": first_wins, "second_player_wins": second_wins, "draws": draws}
+                 for board_size, win_condition, difficulty, games, first_wins, second_wins, draws in store.get_rules_summary()]
+    finally:
+        store.close()
+    print(json.dumps({"players": players, "rules": rules}, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""The 8 rotations and reflections of a square board, and canonical forms of positions under them"""
+from functools import lru_cache
+from transposition import get_zobrist_keys
+
+# Each symmetry maps (row, col) to its image on a board of size n
+SYMMETRY_FUNCTIONS = (
+    lambda row, col, n: (row, col),                    # Identity
+    lambda row, col, n: (col, n - 1 - row),            # Rotate 90 degrees clockwise
+    lambda row, col, n: (n - 1 - row, n - 1 - col),    # Rotate 180 degrees
+    lambda row, col, n: (n - 1 - col, row),            # Rotate 270 degrees clockwise
+    lambda row, col, n: (row, n - 1 - col),            # Mirror left-right
+    lambda row, col, n: (n - 1 - row, col),            # Mirror top-bottom
+    lambda row, col, n: (col, row),                    # Mirror on the main diagonal
+    lambda row, col, n: (n - 1 - col, n - 1 - row),    # Mirror on the anti-diagonal
+)
+INVERSE_SYMMETRIES = (0, 3, 2, 1, 4, 5, 6, 7)   # The symmetry that undoes each one (only the quarter turns differ)
+
+@lru_cache(maxsize=None)
+def get_symmetry_permutations(board_size: int) -> tuple:
+    """Returns, for each symmetry, a tuple mapping every square index to its image's index"""
+    permutations = []
+    for function in SYMMETRY_FUNCTIONS:
+        permutation = []
+        for index in range(board_size * board_size):
+            row, col = function(*divmod(index, board_size), board_size)
+            permutation.append(row * board_size + col)
+        permutations.append(tuple(permutation))
+    return tuple(permutations)
+
+@lru_cache(maxsize=None)
+def get_transform_tables(board_size: int) -> tuple:
+    """Returns, for each symmetry, lookup tables that map every byte of a bitmask to its transformed bits"""
+    cells = board_size * board_size
+    all_tables = []
+    for permutation in get_symmetry_permutations(board_size):
+        tables = []
+        for chunk_start in range(0, cells, 8):
+            images = [1 << permutation[chunk_start + bit] if chunk_start + bit < cells else 0 for bit in range(8)]
+            # Each byte's image is the image of the byte without its lowest bit plus that bit's image,
+            # so the table builds in one pass instead of testing all 8 bits of every byte
+            table = [0] * 256
+            for byte in range(1, 256):
+                low_bit = byte & -byte
+                table[byte] = table[byte ^ low_bit] | images[low_bit.bit_length() - 1]
+            tables.append(tuple(table))
+        all_tables.append(tuple(tables))
+    return tuple(all_tables)
+
+def transform_bits(bits: int, tables: tuple) -> int:
+    """Applies one symmetry (given by its byte tables) to a bitmask"""
+    transformed = 0
+    for table in tables:
+        if not bits:
+            break
+        transformed |= table[bits & 255]
+        bits >>= 8
+    return transformed
+
+def canonical_position(first_bits: int, second_bits: int, board_size: int) -> tuple:
+    """Returns (key, symmetry) where key is the smallest encoding of the position over all 8 symmetries
+
+    Symmetric positions share one key. The symmetry is the index of the transformation that produced it.
+    """
+    shift = board_size * board_size
+    best_key = None
+    best_symmetry = 0
+    for symmetry, tables in enumerate(get_transform_tables(board_size)):
+        key = transform_bits(first_bits, tables) | transform_bits(second_bits, tables) << shift
+        if best_key is None or key < best_key:
+            best_key = key
+            best_symmetry = symmetry
+    return best_key, best_symmetry
+
+def transform_move(row: int, col: int, symmetry: int, board_size: int) -> tuple:
+    """Maps a square through one symmetry"""
+    return SYMMETRY_FUNCTIONS[symmetry](row, col, board_size)
+
+@lru_cache(maxsize=None)
+def get_symmetric_zobrist_keys(board_size: int, symbol: str) -> tuple:
+    """Returns, for every square, the Zobrist keys of its image under each of the 8 symmetries
+
+    XOR-ing the keys of one symmetry over a position's stones gives the Zobrist hash of that symmetric image.
+    """
+    keys = get_zobrist_keys(board_size, symbol)
+    permutations = get_symmetry_permutations(board_size)
+    return tuple(tuple(keys[permutation[index]] for permutation in permutations) for index in range(board_size * board_size))
+
+def get_position_symmetries(bits: list, board_size: int) -> list:
+    """Returns the symmetries that map the position (one bitmask per symbol) onto itself"""
+    return [symmetry for symmetry, tables in enumerate(get_transform_tables(board_size))
+            if all(transform_bits(symbol_bits, tables) == symbol_bits for symbol_bits in bits)]
+
+def unique_moves(moves: list, symmetries: list, board_size: int) -> list:
+    """Keeps the first move of each group of moves that the position's symmetries make equivalent, in the original order"""
+    if len(symmetries) <= 1:
+        return list(moves)
+    seen = set()
+    unique = []
+    for row, col in moves:
+        if (row, col) in seen:
+            continue
+        unique.append((row, col))
+        seen.update(transform_move(row, col, symmetry, board_size) for symmetry in symmetries)
+    return unique
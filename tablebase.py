@@ -0,0 +1,188 @@
+"""Offline perfect-play solver and memory-mapped tablebase for small boards"""
+import argparse
+import mmap
+import os
+import struct
+import sys
+import time
+from functools import lru_cache
+from bitboard import BitBoard
+from symmetry import canonical_position
+
+TABLEBASE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tablebases")
+DEFAULT_TABLEBASES = ((3, 3), (4, 3))   # (board_size, win_condition) pairs built when none are given
+
+MAGIC = b"TTTB"
+VERSION = 1
+HEADER = struct.Struct("<4sBBBxQ")   # Magic, version, board size, win condition, padding, slot count
+SLOT = struct.Struct("<Qb")          # Canonical key + 1 (0 marks an empty slot), score
+HASH_MULTIPLIER = 0x9E3779B97F4A7C15
+SCORE_BASE = 100   # A win scores SCORE_BASE minus the ply the game ends on, so quicker wins score higher
+MAX_BOARD_SIZE = 5   # Largest board whose canonical key (two bits per square, plus one) fits a slot's 64-bit key
+
+def tablebase_path(board_size: int, win_condition: int) -> str:
+    """Returns the file path of the tablebase for a board size and win condition"""
+    return os.path.join(TABLEBASE_DIR, f"{board_size}x{board_size}_win{win_condition}.ttb")
+
+def check_board_size(board_size: int) -> None:
+    """Raises ValueError if a board is too large for the tablebase format"""
+    if board_size > MAX_BOARD_SIZE:
+        raise ValueError(f"Tablebases only support boards up to {MAX_BOARD_SIZE}x{MAX_BOARD_SIZE}, not {board_size}x{board_size}.")
+
+def solve_positions(board_size: int, win_condition: int) -> dict:
+    """Solves every position reachable from the empty board and returns {canonical key: score}
+
+    Scores are exact and from the side to move's point of view: SCORE_BASE minus the final ply
+    for a win, 0 for a draw, and the negation of that for a loss. Positions that are already won
+    are not stored, since the move that won is always checked directly.
+    """
+    check_board_size(board_size)
+    cells = board_size * board_size
+    full_mask = (1 << cells) - 1
+    checker = BitBoard(board_size, win_condition)
+    scores = {}
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), cells * 4 + 100))
+
+    def solve(first_bits: int, second_bits: int, ply: int) -> int:
+        key = canonical_position(first_bits, second_bits, board_size)[0]
+        score = scores.get(key)
+        if score is not None:
+            return score
+
+        occupied = first_bits | second_bits
+        if occupied == full_mask:
+            scores[key] = 0   # Full board without a winner is a draw
+            return 0
+
+        mover_bits = first_bits if ply % 2 == 0 else second_bits
+        best_score = -SCORE_BASE
+        for index in range(cells):
+            bit = 1 << index
+            if occupied & bit:
+                continue
+            checker.bits = {"X": mover_bits | bit}
+            if checker.is_win_at(index // board_size, index % board_size, "X"):
+                score = SCORE_BASE - (ply + 1)
+            elif ply % 2 == 0:
+                score = -solve(first_bits | bit, second_bits, ply + 1)
+            else:
+                score = -solve(first_bits, second_bits | bit, ply + 1)
+            best_score = max(best_score, score)
+
+        scores[key] = best_score
+        return best_score
+
+    solve(0, 0, 0)
+    return scores
+
+def slot_index(key: int, slot_bits: int) -> int:
+    """Returns the home slot of a key in a table of 2 ** slot_bits slots"""
+    return ((key * HASH_MULTIPLIER) & 0xFFFFFFFFFFFFFFFF) >> (64 - slot_bits)
+
+def write_tablebase(path: str, board_size: int, win_condition: int, scores: dict) -> None:
+    """Writes the scores as an open-addressing hash table with linear probing, at most half full"""
+    check_board_size(board_size)
+    slot_bits = max(1, (2 * len(scores) - 1).bit_length())
+    slot_count = 1 << slot_bits
+    slots = bytearray(slot_count * SLOT.size)
+
+    for key, score in scores.items():
+        index = slot_index(key, slot_bits)
+        while SLOT.unpack_from(slots, index * SLOT.size)[0]:
+            index = (index + 1) & (slot_count - 1)
+        SLOT.pack_into(slots, index * SLOT.size, key + 1, score)
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as tablebase_file:
+        tablebase_file.write(HEADER.pack(MAGIC, VERSION, board_size, win_condition, slot_count))
+        tablebase_file.write(slots)
+
+class Tablebase:
+    """Read-only, memory-mapped tablebase answering exact scores and perfect-play moves in O(1)"""
+
+    def __init__(self, path: str) -> None:
+        self.file = open(path, "rb")
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.board_size, self.win_condition, self.slot_count = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} tablebase.")
+        self.slot_bits = self.slot_count.bit_length() - 1
+        self.checker = BitBoard(self.board_size, self.win_condition)
+
+    def lookup(self, first_bits: int, second_bits: int):
+        """Returns the score of a position for the side to move, or None if it is not in the table"""
+        key = canonical_position(first_bits, second_bits, self.board_size)[0] + 1
+        index = slot_index(key - 1, self.slot_bits)
+        while True:
+            stored_key, score = SLOT.unpack_from(self.data, HEADER.size + index * SLOT.size)
+            if stored_key == key:
+                return score
+            if stored_key == 0:
+                return None
+            index = (index + 1) & (self.slot_count - 1)
+
+    def best_move(self, first_bits: int, second_bits: int):
+        """Returns the perfect-play move for the side to move, or None if the position is not covered
+
+        The side to move follows from the stone counts, as the first player always moves on even plies.
+        Ties keep the first move in row-major order.
+        """
+        board_size = self.board_size
+        ply = (first_bits | second_bits).bit_count()
+        first_to_move = ply % 2 == 0
+        mover_bits = first_bits if first_to_move else second_bits
+        occupied = first_bits | second_bits
+
+        best_move = None
+        best_score = None
+        for index in range(board_size * board_size):
+            bit = 1 << index
+            if occupied & bit:
+                continue
+            row, col = divmod(index, board_size)
+            self.checker.bits = {"X": mover_bits | bit}
+            if self.checker.is_win_at(row, col, "X"):
+                return row, col   # Winning now is always at least as good as any table score
+            if first_to_move:
+                child_score = self.lookup(first_bits | bit, second_bits)
+            else:
+                child_score = self.lookup(first_bits, second_bits | bit)
+            if child_score is None:
+                return None
+            if best_score is None or -child_score > best_score:
+                best_score = -child_score
+                best_move = (row, col)
+        return best_move
+
+    def close(self) -> None:
+        """Unmaps and closes the tablebase file"""
+        self.data.close()
+        self.file.close()
+
+@lru_cache(maxsize=None)
+def load_tablebase(board_size: int, win_condition: int):
+    """Returns the tablebase for a board size and win condition, or None if it has not been built"""
+    path = tablebase_path(board_size, win_condition)
+    if not os.path.exists(path):
+        return None
+    return Tablebase(path)
+
+def main():
+    parser = argparse.ArgumentParser(description="Solve small Tic Tac Toe boards exactly and write their tablebases.")
+    parser.add_argument("boards", nargs="*", help="board_size:win_condition pairs to build (default: 3:3 4:3)")
+    args = parser.parse_args()
+
+    boards = [tuple(int(part) for part in board.split(":")) for board in args.boards] or DEFAULT_TABLEBASES
+    for board_size, _ in boards:
+        if board_size > MAX_BOARD_SIZE:
+            parser.error(f"tablebases only support boards up to {MAX_BOARD_SIZE}x{MAX_BOARD_SIZE}, not {board_size}x{board_size}")
+    for board_size, win_condition in boards:
+        start = time.perf_counter()
+        scores = solve_positions(board_size, win_condition)
+        path = tablebase_path(board_size, win_condition)
+        write_tablebase(path, board_size, win_condition, scores)
+        print(f"{board_size}x{board_size} win {win_condition}: {len(scores)} positions, {os.path.getsize(path)} bytes, "
+              f"{time.perf_counter() - start:.1f} s -> {path}")
+
+if __name__ == "__main__":
+    main()
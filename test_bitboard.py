@@ -0,0 +1,63 @@
+"""Regression tests: the bitboard win checks agree with the original list-of-lists scan on random positions"""
+import random
+import pytest
+from bitboard import BitBoard, EMPTY
+from sparse_board import SparseBoard
+
+POSITIONS = 300   # Random positions per board size and win condition
+
+def list_is_win(board: list, player_symbol: str, win_condition: int) -> bool:
+    """The original list-of-lists is_win, kept here as the reference"""
+    board_size = len(board)
+
+    # Check rows and columns
+    for i in range(board_size):
+        for j in range(board_size - win_condition + 1):
+            if all(board[i][j + k] == player_symbol for k in range(win_condition)):
+                return True
+            if all(board[j + k][i] == player_symbol for k in range(win_condition)):
+                return True
+
+    # Check diagonals
+    for i in range(board_size - win_condition + 1):
+        for j in range(board_size - win_condition + 1):
+            if all(board[i + k][j + k] == player_symbol for k in range(win_condition)):
+                return True
+            if all(board[i + k][board_size - 1 - j - k] == player_symbol for k in range(win_condition)):
+                return True
+
+    return False
+
+def rules(sizes: range) -> list:
+    """Returns (board_size, win_condition) for every win condition from 3 to each board size"""
+    return [(board_size, win_condition) for board_size in sizes for win_condition in range(3, board_size + 1)]
+
+@pytest.mark.parametrize("board_size, win_condition", rules(range(3, 9)))
+def test_is_win_matches_list_scan(board_size, win_condition):
+    rng = random.Random(board_size * 100 + win_condition)
+    for _ in range(POSITIONS):
+        # Random fills of every density, including positions where both sides have a line
+        board = [[rng.choice(("X", "O", EMPTY)) for _ in range(board_size)] for _ in range(board_size)]
+        bitboard = BitBoard.from_board(board, win_condition)
+        for symbol in ("X", "O"):
+            assert bitboard.is_win(symbol) == list_is_win(board, symbol, win_condition)
+
+@pytest.mark.parametrize("board_class, board_size, win_condition",
+                         [(BitBoard, *rule) for rule in rules(range(3, 9))] + [(SparseBoard, 9, 5), (SparseBoard, 15, 5)])
+def test_is_win_at_matches_list_scan(board_class, board_size, win_condition):
+    rng = random.Random(board_size * 100 + win_condition)
+    for _ in range(POSITIONS // 10):
+        # Random games up to their first win: a move wins exactly when the whole board first shows a line
+        board = [[EMPTY] * board_size for _ in range(board_size)]
+        bitboard = board_class(board_size, win_condition)
+        squares = [(row, col) for row in range(board_size) for col in range(board_size)]
+        rng.shuffle(squares)
+        for turn, (row, col) in enumerate(squares):
+            symbol = ("X", "O")[turn % 2]
+            board[row][col] = symbol
+            bitboard.place(row, col, symbol)
+            won = list_is_win(board, symbol, win_condition)
+            assert bitboard.is_win_at(row, col, symbol) == won
+            assert bitboard.is_win(symbol) == won
+            if won:
+                break
@@ -0,0 +1,32 @@
+"""Regression tests: the AI search returns no move on a full board instead of searching forever"""
+import pytest
+from engine import Engine, GameState, DIFFICULTY_SETTINGS
+from parallel_search import ParallelSearcher
+from search import Searcher
+
+# A drawn 3x3 game, X first, that fills the board
+DRAWN_GAME = [(0, 0), (0, 1), (0, 2), (1, 1), (1, 0), (1, 2), (2, 1), (2, 0), (2, 2)]
+
+def full_board_state() -> GameState:
+    """Returns the position after the drawn game"""
+    state = GameState(3, 3)
+    for row, col in DRAWN_GAME:
+        state.apply_move(row, col)
+    return state
+
+@pytest.mark.parametrize("difficulty", list(DIFFICULTY_SETTINGS))
+def test_engine_returns_no_move_on_full_board(difficulty):
+    state = full_board_state()
+    engine = Engine(difficulty, seed=0, settings={"tablebase": False})
+    assert engine.get_best_move(state, 1) is None
+    assert engine.iterative_deepening(state, 0.1) is None
+
+@pytest.mark.parametrize("searcher_class", [Searcher, ParallelSearcher])
+def test_search_root_returns_no_move_without_moves(searcher_class):
+    board = full_board_state().bitboard.copy()
+    searcher = searcher_class()
+    try:
+        assert searcher.search_root(board, "O", "X", 1, []) == (None, 0)
+    finally:
+        if isinstance(searcher, ParallelSearcher):
+            searcher.close()
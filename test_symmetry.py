@@ -0,0 +1,39 @@
+"""Tests that symmetry reduction finds an equivalent move with far fewer nodes, and costs nothing on asymmetric positions"""
+import pytest
+from engine import Engine, GameState
+from symmetry import canonical_position
+
+# (board_size, win_condition, max_depth, moves) for positions with more symmetries than the identity
+SYMMETRIC_POSITIONS = [
+    (3, 3, 8, []),
+    (4, 3, 3, []),
+    (5, 4, 3, []),
+    (5, 4, 4, [(2, 2)]),
+]
+ASYMMETRIC_POSITIONS = [
+    (5, 4, 4, [(2, 2), (1, 1), (2, 1)]),
+    (4, 4, 4, [(0, 1), (2, 2)]),
+]
+
+def search(board_size: int, win_condition: int, max_depth: int, moves: list, symmetry: bool) -> tuple:
+    """Returns (canonical key of the position after the chosen move, score, nodes) of a fixed-depth Hard search"""
+    state = GameState(board_size, win_condition)
+    for row, col in moves:
+        state.apply_move(row, col)
+    engine = Engine("hard", settings={"time_budget": None, "tablebase": False, "symmetry": symmetry, "candidate_radius": None})
+    move = engine.get_best_move(state, max_depth)
+    child = state.bitboard.copy()
+    child.place(move[0], move[1], state.to_move)
+    return canonical_position(child.bits["X"], child.bits["O"], board_size)[0], engine.searcher.best_score, engine.searcher.nodes
+
+@pytest.mark.parametrize("board_size, win_condition, max_depth, moves", SYMMETRIC_POSITIONS)
+def test_symmetry_finds_equivalent_move_with_fewer_nodes(board_size, win_condition, max_depth, moves):
+    plain_child, plain_score, plain_nodes = search(board_size, win_condition, max_depth, moves, symmetry=False)
+    child, score, nodes = search(board_size, win_condition, max_depth, moves, symmetry=True)
+    assert score == plain_score
+    assert child == plain_child   # The same move up to a symmetry of the board
+    assert nodes * 2 < plain_nodes
+
+@pytest.mark.parametrize("board_size, win_condition, max_depth, moves", ASYMMETRIC_POSITIONS)
+def test_asymmetric_positions_search_as_without_symmetry(board_size, win_condition, max_depth, moves):
+    assert search(board_size, win_condition, max_depth, moves, symmetry=True) == search(board_size, win_condition, max_depth, moves, symmetry=False)
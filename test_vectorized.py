@@ -0,0 +1,31 @@
+"""Tests that the NumPy batch classifier agrees with the bitboard classifier on random boards"""
+import random
+import pytest
+from bitboard import BitBoard, EMPTY
+
+pytest.importorskip("numpy")
+import vectorized
+from vectorized import classify_board, classify_boards, classify_stack, encode_boards
+
+BOARDS = 2000   # Random boards per board size and win condition
+
+def random_boards(board_size: int, win_condition: int) -> list:
+    """Returns random boards, a quarter of them full, so that both sides often have a line"""
+    rng = random.Random(board_size * 100 + win_condition)
+    boards = []
+    for number in range(BOARDS):
+        cells = ("X", "O") if number % 4 == 0 else ("X", "O", EMPTY)
+        boards.append([[rng.choice(cells) for _ in range(board_size)] for _ in range(board_size)])
+    return boards
+
+@pytest.mark.parametrize("board_size, win_condition", [(3, 3), (4, 3), (4, 4), (7, 4), (7, 5)])
+def test_batch_classification_matches_bitboard(board_size, win_condition, monkeypatch):
+    monkeypatch.setattr(vectorized, "CHUNK_SIZE", 300)   # Several chunks, the last one partial
+    boards = random_boards(board_size, win_condition)
+    expected = [classify_board(board, win_condition) for board in boards]
+    assert classify_stack(encode_boards(boards), win_condition).tolist() == expected
+    assert classify_boards(boards, win_condition) == expected
+
+    # The boards include full boards and boards where both sides have a line
+    assert any(all(cell != EMPTY for row in board for cell in row) for board in boards)
+    assert any(all(BitBoard.from_board(board, win_condition).is_win(symbol) for symbol in ("X", "O")) for board in boards)
@@ -1,47 +1,18 @@
 import tkinter as tk
 from tkinter import messagebox
-import random
+import queue
 import threading
+import time
+from bitboard import BitBoard
+from engine import GameState, Engine, Player
+from game_records import GameRecordWriter
+from statistics_store import StatisticsStore, DRAW, FIRST_WINS, SECOND_WINS
 
-class Player:
-    """Player Class for Tic Tac Toe Game"""
+AI_POLL_INTERVAL = 50      # Milliseconds between checks for the AI's move, which also refresh the thinking indicator
+AI_CANCEL_TIMEOUT = 1.0    # Seconds to wait for a cancelled AI search to stop
+BOARD_PIXELS = 600         # Width and height of the board canvas
+MIN_CELL_PIXELS = 30       # Smallest square drawn, so the largest boards stay easy to click
 
-    def __init__(self, name: str, symbol: str, difficulty=None) -> None:
-        self.name = name
-        self.symbol = symbol
-        self.difficulty = difficulty
-
-class PlayerStatistics:
-    """Class to track player statistics for the current session."""
-
-    def __init__(self):
-        self.statistics = {}
-
-    def record_win(self, player_name):
-        """Record a win for the player."""
-        if player_name in self.statistics:   # Check if the player has already played a game
-            self.statistics[player_name]["wins"] += 1   # Increment wins by 1
-        else:
-            self.statistics[player_name] = {"wins": 1, "losses": 0, "draws": 0}   # Create a new record of this player and increment their wins by 1
-
-    def record_loss(self, player_name):
-        """Record a loss for the player."""
-        if player_name in self.statistics:   # Check if the player has already played a game
-            self.statistics[player_name]["losses"] += 1   # Increment losses by 1
-        else:
-            self.statistics[player_name] = {"wins": 0, "losses": 1, "draws": 0}   # Create a new record of this player and increment their losses by 1
-
-    def record_draw(self, player_name):
-        """Record a draw for the player."""
-        if player_name in self.statistics:   # Check if the player has already played a game
-            self.statistics[player_name]["draws"] += 1   # Increment draws by 1
-        else:
-            self.statistics[player_name] = {"wins": 0, "losses": 0, "draws": 1}   # Create a new record of this player and increment their draws by 1
-
-    def get_player_stats(self, player_name):
-        """Get the statistics for the specified player."""
-        return self.statistics.get(player_name, {"wins": 0, "losses": 0, "draws": 0})
-    
 class TicTacToeBoard:
     """Tic Tac Toe Board Class for GUI"""
 
@@ -58,39 +29,76 @@ class TicTacToeBoard:
 
         if self.board_size is None:
             raise ValueError("Board size is not set.")
-        self.board_buttons = []
-        for row in range(self.board_size):
-            row_buttons = []
-            for col in range(self.board_size):
-                button = tk.Button(self.root, text="", command=lambda r=row, c=col: self.handle_button_click(r, c))
-                button.grid(row=row + 3, column=col, padx=5, pady=5, sticky="nsew")
-                row_buttons.append(button)
-            self.board_buttons.append(row_buttons)
-        
-        for i in range(self.board_size):
-            self.root.grid_rowconfigure(i + 3, weight=1)
-            self.root.grid_columnconfigure(i, weight=1)
+        self.cell_size = max(BOARD_PIXELS // self.board_size, MIN_CELL_PIXELS)
+        self.font = ("Arial", -int(self.cell_size * 0.7))   # Set once instead of on every redraw
+        self.shown = [[" "] * self.board_size for _ in range(self.board_size)]   # Symbol currently drawn on each square
+        self.symbol_items = {}     # {(row, col): canvas item of the symbol drawn on that square}
+        self.dirty_cells = set()   # Squares whose symbol changed since the last redraw
+        self.locked = False        # Ignores clicks on the whole board, e.g. while the AI is thinking
+
+        # One canvas for the whole board, so even a 19x19 board is a handful of widgets instead of one button per square
+        size = self.cell_size * self.board_size
+        self.canvas = tk.Canvas(self.root, width=size, height=size, background="white", highlightthickness=0)
+        self.canvas.grid(row=3, column=0, padx=5, pady=5)
+        for i in range(1, self.board_size):
+            self.canvas.create_line(i * self.cell_size, 0, i * self.cell_size, size, fill="gray")
+            self.canvas.create_line(0, i * self.cell_size, size, i * self.cell_size, fill="gray")
+        self.canvas.bind("<Button-1>", self.handle_canvas_click)
+
+    def mark_dirty(self, row: int, col: int) -> None:
+        """Queues a square to be repainted on the next update_gui_board"""
+        self.dirty_cells.add((row, col))
     
     def update_gui_board(self, player1, player2):
-        """Updates the GUI board with the player symbols"""
+        """Updates the GUI board with the player symbols, repainting only the squares that changed"""
         
         if self.board_size is None or self.game_board is None:
             return  # Return if board size or board is not initialized
-        
-        font_size = -int(100 / self.board_size)
 
+        for row, col in self.dirty_cells:
+            symbol = self.game_board[row][col]
+            if symbol == self.shown[row][col]:
+                continue
+            item = self.symbol_items.pop((row, col), None)
+            if item is not None:
+                self.canvas.delete(item)
+            if symbol == player1.symbol:
+                text, color = "X", 'blue'
+            elif symbol == player2.symbol:
+                text, color = "O", 'red'
+            else:
+                text = None
+            if text is not None:
+                center = ((col + 0.5) * self.cell_size, (row + 0.5) * self.cell_size)
+                self.symbol_items[(row, col)] = self.canvas.create_text(*center, text=text, fill=color, font=self.font)
+            self.shown[row][col] = symbol
+        self.dirty_cells.clear()
+
+    def reset_board(self, game_board, player1, player2) -> None:
+        """Shows a new game on the existing canvas by clearing the squares that hold a symbol"""
+        self.game_board = game_board
         for row in range(self.board_size):
             for col in range(self.board_size):
-                button = self.board_buttons[row][col]
-                if self.game_board[row][col] == player1.symbol:
-                    button.config(text="X", font=("Arial", font_size), fg='blue')
-                elif self.game_board[row][col] == player2.symbol:
-                    button.config(text="O", font=("Arial", font_size), fg='red')
-                else:
-                    self.board_buttons[row][col].config(text="", font=("Arial", font_size), state='normal')
-    
+                if self.shown[row][col] != " ":
+                    self.mark_dirty(row, col)
+        self.update_gui_board(player1, player2)
+        self.set_locked(False)
+
+    def set_locked(self, locked: bool) -> None:
+        """Locks or unlocks input for the whole board in one step, showing a busy cursor while locked"""
+        self.locked = locked
+        self.root.config(cursor="watch" if locked else "")
+
+    def handle_canvas_click(self, event) -> None:
+        """Maps a click on the canvas to the square under it"""
+        row, col = event.y // self.cell_size, event.x // self.cell_size
+        if 0 <= row < self.board_size and 0 <= col < self.board_size:
+            self.handle_button_click(row, col)
+
     def handle_button_click(self, row, col):
-        """Handles button click event"""
+        """Handles a click on a square"""
+        if self.locked:
+            return
         if self.game_board[row][col] == " ":
             if self.game_instance.get_move(row, col):
                 pass
@@ -116,15 +124,25 @@ class Game:
         self.board = None
         self.tic_tac_toe_board = tic_tac_toe_board
         self.current_player = 1
+        self.state = None    # Headless GameState holding the position; self.board is its list-of-lists view
+        self.engine = None   # Headless AI Engine, only created when Player 2 is the AI
+        self.ai_results = queue.Queue()   # (turn id, move) pairs posted by the AI worker thread
+        self.ai_worker = None
+        self.ai_turn_id = 0               # Changes for every AI turn and cancellation, so stale moves are ignored
+        self.thinking_label = None
+        self.think_times = [0.0, 0.0]   # Seconds each player has spent on their moves this game
+        self.turn_start = time.perf_counter()
         
     def initialize_game_board(self):
         """Initialize the game board after receiving input"""
-        self.board = [[" " for _ in range(self.board_size)] for _ in range(self.board_size)]
+        self.state = GameState(self.board_size, self.win_condition, (self.player1.symbol, "O"))
+        self.board = self.state.board
         
         # Set player2 based on selected player type
         player_type = self.player2.name
         if player_type == "AI":
             self.player2 = Player("AI", "O", self.player2.difficulty) # Sets to AI with inputted difficulty
+            self.engine = Engine(self.player2.difficulty)
         else:
             self.player2 = Player("Player 2", "O") # Default human player 2
 
@@ -138,48 +156,34 @@ class Game:
         self.tic_tac_toe_board = TicTacToeBoard(self.board_window, self.board_size, self.win_condition, self, self.board)
         self.tic_tac_toe_board.board_size = self.board_size
         self.tic_tac_toe_board.win_condition = self.win_condition
+        # Shows that the AI is searching, and how fast, while its move is pending
+        self.thinking_label = tk.Label(self.board_window, text="")
+        self.thinking_label.grid(row=0, column=0)
+        self.board_window.protocol("WM_DELETE_WINDOW", self.close_game)
         self.board_window.deiconify()
         self.settings_window.withdraw()
 
     def update_board(self, row: int, col: int, current_player: Player) -> None:
         """Updates the game board with the player's move"""
-        self.board[row][col] = current_player.symbol
+        now = time.perf_counter()
+        self.think_times[0 if current_player is self.player1 else 1] += now - self.turn_start
+        self.turn_start = now
+        self.state.apply_move(row, col)
         self.tic_tac_toe_board.game_board = self.board
+        self.tic_tac_toe_board.mark_dirty(row, col)
         self.tic_tac_toe_board.update_gui_board(self.player1, self.player2)
 
     def get_empty_spaces(self) -> list:
         """Returns a list of coordinates for all empty spaces on the board"""
-        empty_spaces = []
-        for row in range(self.board_size):
-            for col in range(self.board_size):
-                if self.board[row][col] == " ":
-                    empty_spaces.append((row, col))
-        return empty_spaces
+        return self.state.get_empty_spaces()
 
     def is_win(self, player_symbol: str, win_condition: int) -> bool:
         """Checks if the specified player has won the game"""
+        return BitBoard.from_board(self.board, win_condition).is_win(player_symbol)
 
-        # Check rows and columns
-        for i in range(self.board_size):
-            for j in range(self.board_size - win_condition + 1):
-                # Check rows
-                if all(self.board[i][j + k] == player_symbol for k in range(win_condition)):
-                    return True
-                # Check columns
-                if all(self.board[j + k][i] == player_symbol for k in range(win_condition)):
-                    return True
-
-        # Check diagonals
-        for i in range(self.board_size - win_condition + 1):
-            for j in range(self.board_size - win_condition + 1):
-                # Check diagonal from top-left to bottom-right
-                if all(self.board[i + k][j + k] == player_symbol for k in range(win_condition)):
-                    return True
-                # Check diagonal from top-right to bottom-left
-                if all(self.board[i + k][self.board_size - 1 - j - k] == player_symbol for k in range(win_condition)):
-                    return True
-
-        return False
+    def is_win_at(self, row: int, col: int, player_symbol: str) -> bool:
+        """Checks if the move at (row, col) won the game by counting consecutive symbols out from that square"""
+        return self.state.bitboard.is_win_at(row, col, player_symbol)
 
     def check_consecutive(self, line: list, player_symbol: str, win_condition: int) -> bool:
         """Checks if there are consecutive symbols of a player in a line"""
@@ -195,6 +199,10 @@ class Game:
 
     def get_move(self, row, col):
         """Handles the player's move"""
+        # Ignore clicks while the AI is thinking
+        if self.current_player == 2 and self.player2.name == "AI":
+            return
+
         # Makes sure the current player is correct
         if self.current_player == 1:
             current_player = self.player1
@@ -204,11 +212,11 @@ class Game:
         self.update_board(row, col, current_player)
 
         # Checks if the game is over. If not, switches the current_player to the next player
-        if self.evaluate(current_player.symbol):
+        if self.state.winner is not None:
             # Check if a win has been achieved
             self.game_over_dialog(current_player)
 
-        elif len(self.get_empty_spaces()) == 0:
+        elif self.state.is_draw():
             # Check if a draw has occured
             self.game_over_dialog(None)
         
@@ -217,163 +225,101 @@ class Game:
             if self.current_player == 1:
                 self.current_player = 2
                 if self.player2.name == "AI":
-                    self.ai_turn()
-                    self.current_player = 1
+                    self.ai_turn()   # Player 1 moves again once the AI's move has been played
             else:
                 self.current_player = 1      # Executes when Player 2 is human so that Player 1 is now the current player
                     
-    def get_best_move(self, player_symbol: str, opponent_symbol: str, win_condition: int, max_depth: int) -> tuple:
+    def get_best_move(self, player_symbol: str, opponent_symbol: str, win_condition: int, max_depth: int, previous_best: tuple = None) -> tuple:
         """Uses the minimax algorithm with alpha-beta pruning to determine the best move for the AI player"""
-        empty_spaces = self.get_empty_spaces()
-
-        # Check if the AI difficulty is easy
-        if self.player2.difficulty == "easy":
-            # Add randomness to the decision-making process so that AI will be more prone to mistakes
-            return random.choice(empty_spaces) if empty_spaces else None    
-        
-        elif self.player2.difficulty == "hard":
-            # Proceed with setting up the minimax algorithm using alpha-beta pruning for the AI
-            best_score = -float("inf")
-            best_move = None
-            alpha = -float("inf")
-            beta = float("inf")
-
-            for row, column in empty_spaces:
-                self.board[row][column] = player_symbol
-                score = self.minimax(self.board, 0, alpha, beta, False, win_condition, player_symbol, opponent_symbol, max_depth)
-                self.board[row][column] = " "
-
-                if score > best_score:
-                    best_score = score
-                    best_move = (row, column)
-
-            return best_move
-        
-        elif self.player2.difficulty == "very_hard":
-            # Proceed with setting up the minimax algorithm using alpha-beta pruning and a move ordering heuristic for the AI
-            best_score = -float("inf")
-            best_move = None
-            alpha = -float("inf")
-            beta = float("inf")
+        return self.engine.get_best_move(self.state, max_depth, previous_best)
 
-            # Generate a list of moves sorted by a heuristic function
-            ordered_moves = self.order_moves(empty_spaces, player_symbol, opponent_symbol)
+    def iterative_deepening(self, player_symbol: str, opponent_symbol: str, win_condition: int, time_budget: float) -> tuple:
+        """Searches one ply deeper per pass until the time budget runs out and returns the deepest completed result"""
+        return self.engine.iterative_deepening(self.state, time_budget)
 
-            for row, column in ordered_moves:
-                self.board[row][column] = player_symbol
-                score = self.minimax(self.board, 0, alpha, beta, False, win_condition, player_symbol, opponent_symbol, max_depth)
-                self.board[row][column] = " "
-
-                if score > best_score:
-                    best_score = score
-                    best_move = (row, column)
-
-            return best_move
-
-    def minimax(self, board: list, depth: int, alpha: int, beta: int, is_maximizing: bool, win_condition: int, player_symbol: str, opponent_symbol: str, max_depth: int):
+    def minimax(self, board, depth: int, alpha: int, beta: int, is_maximizing: bool, win_condition: int, player_symbol: str, opponent_symbol: str, max_depth: int, last_move: tuple = None):
         """Minimax algorithm with alpha-beta pruning for AI player"""
+        # Accept a list-of-lists board for callers that still pass one, but search on a bitboard
+        if not isinstance(board, BitBoard):
+            board = BitBoard.from_board(board, win_condition, (player_symbol, opponent_symbol))
 
-        # Base case: check if the game is over or the depth limit has been reached
-        if depth == max_depth or self.evaluate(player_symbol) or self.evaluate(opponent_symbol):
-            return self.evaluate(player_symbol) - self.evaluate(opponent_symbol)
-        
-        empty_spaces = [(i, j) for i in range(len(board)) for j in range(len(board[0])) if board[i][j] == " "]
-        if not empty_spaces:
-            return 0
-
-        # Recursive case: evaluate all possible moves and choose the best one
+        # The search itself is negamax, so the minimizing side is the opponent maximizing the negated score
+        searcher = self.engine.searcher
         if is_maximizing:
-            best_score = -float("inf")
-            for i, j in empty_spaces:
-                board[i][j] = player_symbol
-                score = self.minimax(board, depth + 1, alpha, beta, False, win_condition, player_symbol, opponent_symbol, max_depth)
-                board[i][j] = " "
-                best_score = max(score, best_score)
-                alpha = max(alpha, best_score)
-                if beta <= alpha:
-                    break  # Beta cut-off
-            return best_score
-        else:
-            best_score = float("inf")
-            for i, j in empty_spaces:
-                board[i][j] = opponent_symbol
-                score = self.minimax(board, depth + 1, alpha, beta, True, win_condition, player_symbol, opponent_symbol, max_depth)
-                board[i][j] = " "
-                best_score = min(score, best_score)
-                beta = min(beta, best_score)
-                if beta <= alpha:
-                    break  # Alpha cut-off
-            return best_score
-        
-    def order_moves(self, empty_spaces: list, player_symbol: str, opponent_symbol: str) -> list:
-        """Orders the available moves based on a heuristic function (only for Very Hard difficulty)"""
-        ordered_moves = []
-
-        # Group moves by their impact on the game
-        winning_moves = []
-        blocking_moves = []
+            return searcher.negamax(board, depth, alpha, beta, player_symbol, opponent_symbol, max_depth, last_move)
+        return -searcher.negamax(board, depth, -beta, -alpha, opponent_symbol, player_symbol, max_depth, last_move)
 
-        for row, col in empty_spaces:
-            self.board[row][col] = player_symbol
-            if self.is_win(player_symbol, self.win_condition):
-                winning_moves.append((row, col))
-            self.board[row][col] = " "
-
-            self.board[row][col] = opponent_symbol
-            if self.is_win(opponent_symbol, self.win_condition):
-                blocking_moves.append((row, col))
-            self.board[row][col] = " "
+    def order_moves(self, empty_spaces: list, player_symbol: str, opponent_symbol: str, bitboard: BitBoard = None) -> list:
+        """Orders the available moves based on a heuristic function (only for Very Hard difficulty)"""
+        if bitboard is None:
+            bitboard = self.state.bitboard.copy()
+        return self.engine.order_moves(bitboard, empty_spaces, player_symbol, opponent_symbol)
 
-        # Add winning moves first, then blocking moves, then other moves
-        ordered_moves.extend(winning_moves)
-        ordered_moves.extend(blocking_moves)
-        ordered_moves.extend([move for move in empty_spaces if move not in winning_moves and move not in blocking_moves])
+    def ai_thread(self, turn_id: int, state: GameState) -> None:
+        """Thread for AI commands: searches a copy of the game and posts the move to the result queue without touching Tk"""
+        # Search deeper until the difficulty's time budget runs out, so response time no longer depends on board size
+        best_move = self.engine.choose_move(state)
+        self.ai_results.put((turn_id, best_move))
 
-        return ordered_moves
+    def ai_turn(self):
+        """Handles the AI player's turn by starting its search in a worker thread and polling for the result"""
+        # Lock the board so player cannot make a move during AI's turn
+        self.tic_tac_toe_board.set_locked(True)
 
-    def ai_thread(self) -> None:
-        """Thread for AI commands"""
-        player_symbol = self.player2.symbol
-        opponent_symbol = self.player1.symbol
-        win_condition = self.win_condition
+        self.ai_turn_id += 1
+        self.engine.clear_cancel()   # Here rather than in the worker, so a cancel right after this cannot be lost
+        self.ai_worker = threading.Thread(target=self.ai_thread, args=(self.ai_turn_id, self.state.copy()), daemon=True)
+        self.ai_worker.start()
+        self.root.after(AI_POLL_INTERVAL, self.poll_ai_move, self.ai_turn_id, time.perf_counter())
 
-        # Disable all buttons so player cannot press them during AI's turn
-        for row in range(self.board_size):
-            for col in range(self.board_size):
-                self.tic_tac_toe_board.board_buttons[row][col].config(state='disabled')
+    def poll_ai_move(self, turn_id: int, start_time: float) -> None:
+        """Plays the AI's move once the worker has posted it, and updates the thinking indicator until then (runs on the Tk thread)"""
+        if turn_id != self.ai_turn_id:
+            return   # This turn was cancelled
 
-        # Set a maximum depth based on board size (important for gameplay reasons to ensure an AI does not take too long for bigger boards)
-        if self.board_size >= 6:
-            max_depth = 2
-        else:
-            max_depth = 3
-
-        best_move = self.get_best_move(player_symbol, opponent_symbol, win_condition, max_depth)
+        try:
+            result_id, best_move = self.ai_results.get_nowait()
+        except queue.Empty:
+            elapsed = time.perf_counter() - start_time
+            if self.thinking_label is not None and self.thinking_label.winfo_exists() and elapsed > 0:
+                self.thinking_label.config(text=f"AI is thinking... {self.engine.nodes / elapsed:,.0f} nodes/s")
+            self.root.after(AI_POLL_INTERVAL, self.poll_ai_move, turn_id, start_time)
+            return
+        if result_id != turn_id:
+            # A move from a cancelled search; keep waiting for this turn's move
+            self.root.after(AI_POLL_INTERVAL, self.poll_ai_move, turn_id, start_time)
+            return
+
+        self.ai_worker = None
+        self.thinking_label.config(text="")
+        self.current_player = 1
         if best_move is not None:
             row, col = best_move
             self.update_board(row, col, self.player2)
 
-            if self.evaluate(player_symbol):
-                self.game_over_dialog(self.player2)
+        # Unlock the board after AI has made its move
+        self.tic_tac_toe_board.set_locked(False)
 
-        if not self.get_empty_spaces() and not self.evaluate(player_symbol) and not self.evaluate(opponent_symbol):
+        if self.state.winner is not None:
+            self.game_over_dialog(self.player2)
+        elif self.state.is_draw():
             self.game_over_dialog(None)
-        
-        # Re-enable all buttons after AI has made its move
-        if hasattr(self.tic_tac_toe_board, 'board_buttons'):
-            for row in range(self.board_size):
-                for col in range(self.board_size):
-                    button = self.tic_tac_toe_board.board_buttons[row][col]
-                    if button.winfo_exists():
-                        button.config(state='normal')            
-                        
-    def ai_turn(self):
-        """Handles the AI player's turn"""
-        threading.Thread(target=self.ai_thread).start()
+
+    def cancel_ai_turn(self) -> None:
+        """Stops a running AI search and makes sure its move is never played"""
+        self.ai_turn_id += 1
+        if self.ai_worker is not None:
+            self.engine.cancel()
+            self.ai_worker.join(AI_CANCEL_TIMEOUT)   # Let the worker finish before the engine is reused
+            self.ai_worker = None
+        while not self.ai_results.empty():
+            self.ai_results.get_nowait()
+        if self.thinking_label is not None and self.thinking_label.winfo_exists():
+            self.thinking_label.config(text="")
 
     def evaluate(self, player_symbol: str) -> int:
         """Evaluates the current state of the board"""
-        if self.is_win(player_symbol, self.win_condition):
+        if self.state.bitboard.is_win(player_symbol):
             return 1
         else:
             return 0
@@ -390,39 +336,48 @@ class Game:
         else:
             messagebox.showinfo("Draw", "It's a draw!")
 
-        # Record player statistics
-        if winner:
-            player_stats.record_win(winner.name)
-            player_stats.record_loss(self.player1.name if winner.name == self.player2.name else self.player2.name)
+        # Record the game in the statistics database
+        if winner is None:
+            result = DRAW
         else:
-            player_stats.record_draw("Player 1")
-
-            # If statement determining whether the Player 2 was an AI or human
-            if self.player2.name == "AI":
-                player_stats.record_draw("AI")
-            else:
-                player_stats.record_draw("Player 2")
+            result = FIRST_WINS if winner is self.player1 else SECOND_WINS
+        statistics_store.record_game(self.board_size, self.win_condition, self.player2.difficulty, self.player1.name, self.player2.name,
+                                     result, len(self.state.moves), tuple(self.think_times))
+        # Keep the full move history for analysis (see game_records.py)
+        game_record_writer.write_state(self.state, "human", self.player2.difficulty if self.player2.name == "AI" else "human")
+        game_record_writer.flush()
     
         # New message box that asks the player if they want to play again with the same settings
         choice = messagebox.askquestion("Game Over", "Do you want to play again with the same settings?", icon='question')
         if choice == 'yes':
             self.restart_game()
         else:
-            self.tic_tac_toe_board.destroy_board_window() # Destroy the game board window
-            self.settings_window.deiconify()  # Show the settings window
+            self.close_game()
+
+    def close_game(self):
+        """Closes the game board, stopping any AI search, and shows the settings window again"""
+        self.cancel_ai_turn()
+        if self.engine is not None:
+            self.engine.close()   # Stop any search worker processes
+        self.tic_tac_toe_board.destroy_board_window() # Destroy the game board window
+        self.settings_window.deiconify()  # Show the settings window
 
     def restart_game(self):
         """Restarts the game with the same settings."""
+        # Stop the AI if it is still thinking about the old game
+        self.cancel_ai_turn()
         # Clear the game board
-        self.board = [[" " for _ in range(self.board_size)] for _ in range(self.board_size)]
-        # Reset current player
+        self.state.reset()
+        self.board = self.state.board
+        # Forget cached positions from the previous game
+        if self.engine is not None:
+            self.engine.reset()
+        # Reset current player and move timers
         self.current_player = 1
-        # Update GUI board
-        self.tic_tac_toe_board.update_gui_board(self.player1, self.player2)
-        # Destroy the existing game board window
-        self.tic_tac_toe_board.destroy_board_window()
-        # Show the new game board window
-        self.show_game_board()
+        self.think_times = [0.0, 0.0]
+        self.turn_start = time.perf_counter()
+        # Clear the existing game board window instead of building a new one
+        self.tic_tac_toe_board.reset_board(self.board, self.player1, self.player2)
 
 # End of Game Class
 
@@ -449,8 +404,9 @@ def initialize_settings_window(root):
     create_radio_button(settings_window, "Easy", difficulty_var, "easy").grid(row=1, column=1, padx=10, pady=5)
     create_radio_button(settings_window, "Hard", difficulty_var, "hard").grid(row=1, column=2, padx=10, pady=5)
     create_radio_button(settings_window, "Very Hard", difficulty_var, "very_hard").grid(row=1, column=3, padx=10, pady=5)
+    create_radio_button(settings_window, "Monte Carlo", difficulty_var, "mcts").grid(row=1, column=4, padx=10, pady=5)
 
-    create_label(settings_window, "Enter the size of the board (3-8):").grid(row=2, column=0, padx=10, pady=5)
+    create_label(settings_window, "Enter the size of the board (3-19):").grid(row=2, column=0, padx=10, pady=5)
     board_size_entry = tk.Entry(settings_window)
     board_size_entry.grid(row=2, column=1, padx=10, pady=5)
 
@@ -485,26 +441,20 @@ def view_statistics(parent_window):
     # Store the reference to the statistics window in the parent_window
     parent_window.stats_window = stats_window
 
-    # Retrieve player statistics
-    player1_stats = player_stats.get_player_stats("Player 1")
-    player2_stats = player_stats.get_player_stats("Player 2")
-    ai_stats = player_stats.get_player_stats("AI")
+    # The usual players come first, followed by any other names in the database (e.g. from self-play)
+    player_names = ["Player 1", "Player 2", "AI"]
+    player_names += [name for name in statistics_store.get_player_names() if name not in player_names]
 
     # Populate statistics window with player statistics
-    create_label(stats_window, text="Player 1 Statistics").grid(row=0, column=0, padx=10, pady=5)
-    create_label(stats_window, text=f"Wins: {player1_stats['wins']}").grid(row=1, column=0, padx=10, pady=5)
-    create_label(stats_window, text=f"Losses: {player1_stats['losses']}").grid(row=2, column=0, padx=10, pady=5)
-    create_label(stats_window, text=f"Draws: {player1_stats['draws']}").grid(row=3, column=0, padx=10, pady=5)
-
-    create_label(stats_window, text="Player 2 Statistics").grid(row=0, column=1, padx=10, pady=5)
-    create_label(stats_window, text=f"Wins: {player2_stats['wins']}").grid(row=1, column=1, padx=10, pady=5)
-    create_label(stats_window, text=f"Losses: {player2_stats['losses']}").grid(row=2, column=1, padx=10, pady=5)
-    create_label(stats_window, text=f"Draws: {player2_stats['draws']}").grid(row=3, column=1, padx=10, pady=5)
-
-    create_label(stats_window, text="AI Player Statistics").grid(row=0, column=2, padx=10, pady=5)
-    create_label(stats_window, text=f"Wins: {ai_stats['wins']}").grid(row=1, column=2, padx=10, pady=5)
-    create_label(stats_window, text=f"Losses: {ai_stats['losses']}").grid(row=2, column=2, padx=10, pady=5)
-    create_label(stats_window, text=f"Draws: {ai_stats['draws']}").grid(row=3, column=2, padx=10, pady=5)
+    for column, player_name in enumerate(player_names):
+        stats = statistics_store.get_player_stats(player_name)
+        average_think_time = statistics_store.get_average_think_time(player_name)
+        create_label(stats_window, text=f"{player_name} Statistics").grid(row=0, column=column, padx=10, pady=5)
+        create_label(stats_window, text=f"Wins: {stats['wins']}").grid(row=1, column=column, padx=10, pady=5)
+        create_label(stats_window, text=f"Losses: {stats['losses']}").grid(row=2, column=column, padx=10, pady=5)
+        create_label(stats_window, text=f"Draws: {stats['draws']}").grid(row=3, column=column, padx=10, pady=5)
+        if average_think_time is not None:
+            create_label(stats_window, text=f"Average move time: {average_think_time:.2f}s").grid(row=4, column=column, padx=10, pady=5)
 
     def on_close():
         # Clear the reference to the statistics window in the parent_window
@@ -513,7 +463,7 @@ def view_statistics(parent_window):
 
     # Button to close the statistics window
     close_button = tk.Button(stats_window, text="Close", command=on_close)
-    close_button.grid(row=4, column=1, padx=10, pady=10)
+    close_button.grid(row=5, column=0, columnspan=len(player_names), padx=10, pady=10)
 
 def start_game(settings_window, board_size_entry, win_condition_entry, player_var, difficulty_var):
     """Starts the Tic Tac Toe game with the selected settings"""
@@ -528,8 +478,8 @@ def start_game(settings_window, board_size_entry, win_condition_entry, player_va
     board_size = int(board_size_text)
     win_condition = int(win_condition_text)
 
-    if board_size < 3 or board_size > 8:
-        messagebox.showerror("Error", "Board size must be between 3 and 8.")
+    if board_size < 3 or board_size > 19:
+        messagebox.showerror("Error", "Board size must be between 3 and 19.")
         return
 
     if win_condition < 3 or win_condition > board_size:
@@ -566,6 +516,10 @@ def start_game(settings_window, board_size_entry, win_condition_entry, player_va
     tic_tac_toe_game.initialize_game_board()
 
 def main():
+    global statistics_store, game_record_writer
+    statistics_store = StatisticsStore(batch_size=1)   # Each finished game is written at once, so none are lost on exit
+    game_record_writer = GameRecordWriter()
+
     root = tk.Tk()
     root.withdraw()                     
     # Initializes the settings window
@@ -573,8 +527,11 @@ def main():
 
     # Start the main event loop to display the initial player settings window
     root.mainloop()
+    statistics_store.close()
+    game_record_writer.close()
 
-player_stats = PlayerStatistics()                       # Global variable to track player statistics
+statistics_store = None                       # Global StatisticsStore that persists player statistics, opened by main
+game_record_writer = None                     # Global GameRecordWriter that keeps every finished game's moves, opened by main
 
 if __name__ == "__main__":
     main()
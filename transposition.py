@@ -0,0 +1,84 @@
+"""Zobrist hashing and a bounded transposition table for the Tic Tac Toe AI search"""
+import random
+from collections import namedtuple
+from functools import lru_cache
+
+# Bound types stored with each score
+EXACT = 0
+LOWER_BOUND = 1   # Search failed high, so the true score is at least the stored score
+UPPER_BOUND = 2   # Search failed low, so the true score is at most the stored score
+
+TTEntry = namedtuple("TTEntry", ["depth", "score", "flag", "best_move", "age"])
+
+@lru_cache(maxsize=None)
+def get_zobrist_keys(board_size: int, symbol: str) -> tuple:
+    """Returns one random 64-bit key per square for the given symbol (seeded so every process agrees)"""
+    rng = random.Random(f"zobrist:{board_size}:{symbol}")
+    return tuple(rng.getrandbits(64) for _ in range(board_size * board_size))
+
+@lru_cache(maxsize=None)
+def get_side_key(symbol: str) -> int:
+    """Returns the random 64-bit key mixed into a position's hash when symbol is the side to move"""
+    return random.Random(f"side-to-move:{symbol}").getrandbits(64)
+
+class TranspositionTable:
+    """Bounded cache of search results keyed by Zobrist hash"""
+
+    def __init__(self, capacity: int = 200_000) -> None:
+        self.capacity = capacity
+        self.entries = {}
+        self.age = 0
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+
+    def new_search(self) -> None:
+        """Marks the start of a new AI turn so entries from earlier turns are replaced first"""
+        self.age += 1
+
+    def lookup(self, key: int):
+        """Returns the entry stored for a position, or None"""
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return entry
+
+    def store(self, key: int, depth: int, score, flag: int, best_move: tuple = None) -> None:
+        """Stores a search result, preferring deeper results and entries from the current turn"""
+        entries = self.entries
+        old_entry = entries.get(key)
+
+        if old_entry is not None:
+            # Keep a deeper result from this turn rather than overwrite it with a shallower one
+            if old_entry.age == self.age and old_entry.depth > depth:
+                return
+            del entries[key]   # Re-insert so the entry moves to the back of the replacement order
+        elif len(entries) >= self.capacity:
+            # Table is full: evict the oldest inserted entry
+            del entries[next(iter(entries))]
+            self.evictions += 1
+
+        entries[key] = TTEntry(depth, score, flag, best_move, self.age)
+        self.stores += 1
+
+    def clear(self) -> None:
+        """Empties the table and resets its counters"""
+        self.entries.clear()
+        self.age = 0
+        self.hits = self.misses = self.stores = self.evictions = 0
+
+    def stats(self) -> dict:
+        """Returns hit, miss, store and eviction counts for sizing the table"""
+        probes = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "size": len(self.entries),
+            "capacity": self.capacity,
+            "hit_rate": self.hits / probes if probes else 0.0,
+        }
@@ -0,0 +1,92 @@
+"""Batch win/draw detection for many boards at once, vectorized with NumPy when it is installed (no GUI dependencies)"""
+from bitboard import BitBoard, EMPTY
+
+try:
+    import numpy as np
+except ImportError:   # NumPy is optional; everything below falls back to the bitboard code
+    np = None
+
+HAS_NUMPY = np is not None
+CHUNK_SIZE = 65_536   # Boards classified per vectorized step, to bound the memory of the intermediate arrays
+
+# Result of classifying a board
+ONGOING = 0
+FIRST_WINS = 1    # The first symbol (X) has a line; boards where both sides have one count as this
+SECOND_WINS = 2
+DRAW = 3
+
+def encode_boards(boards: list, symbols: tuple = ("X", "O")):
+    """Converts list-of-lists boards into an (N, n, n) int8 array with 1 for the first symbol, -1 for the second and 0 for empty"""
+    if not HAS_NUMPY:
+        raise RuntimeError("encode_boards needs NumPy.")
+    first, second = symbols
+    values = {EMPTY: 0, first: 1, second: -1}
+    return np.array([[[values[cell] for cell in row] for row in board] for board in boards], dtype=np.int8)
+
+def window_sums(stack, win_condition: int) -> list:
+    """Returns the sum of every win window of an (N, n, n) stack, one array per line direction
+
+    Rows and columns use cumulative sums, so each window is the difference of two prefix sums.
+    Diagonals add win_condition shifted views of the stack, a convolution with a diagonal kernel.
+    """
+    board_size = stack.shape[1]
+    span = board_size - win_condition + 1
+    values = stack.astype(np.int16)
+
+    sums = []
+    for axis in (2, 1):   # Rows, then columns
+        prefix = np.cumsum(values, axis=axis)
+        prefix = np.concatenate([np.zeros_like(prefix.take([0], axis=axis)), prefix], axis=axis)
+        sums.append(prefix.take(range(win_condition, board_size + 1), axis=axis) - prefix.take(range(span), axis=axis))
+
+    diagonal = np.zeros((stack.shape[0], span, span), dtype=np.int16)
+    anti_diagonal = np.zeros_like(diagonal)
+    for k in range(win_condition):
+        diagonal += values[:, k:k + span, k:k + span]
+        anti_diagonal += values[:, k:k + span, win_condition - 1 - k:win_condition - 1 - k + span]
+    sums.extend((diagonal, anti_diagonal))
+    return sums
+
+def classify_stack(stack, win_condition: int):
+    """Classifies every board of an (N, n, n) int8 stack and returns an (N,) int8 array of ONGOING/FIRST_WINS/SECOND_WINS/DRAW"""
+    if stack.ndim == 2:
+        stack = stack[np.newaxis]
+    results = np.empty(stack.shape[0], dtype=np.int8)
+    for start in range(0, stack.shape[0], CHUNK_SIZE):
+        chunk = stack[start:start + CHUNK_SIZE]
+        first_wins = np.zeros(chunk.shape[0], dtype=bool)
+        second_wins = np.zeros(chunk.shape[0], dtype=bool)
+        for sums in window_sums(chunk, win_condition):
+            flat = sums.reshape(chunk.shape[0], -1)
+            first_wins |= (flat == win_condition).any(axis=1)
+            second_wins |= (flat == -win_condition).any(axis=1)
+        full = (chunk != 0).all(axis=(1, 2))
+
+        result = np.full(chunk.shape[0], ONGOING, dtype=np.int8)
+        result[full] = DRAW
+        result[second_wins] = SECOND_WINS
+        result[first_wins] = FIRST_WINS
+        results[start:start + CHUNK_SIZE] = result
+    return results
+
+def classify_board(board: list, win_condition: int, symbols: tuple = ("X", "O")) -> int:
+    """Classifies one list-of-lists board with the bitboard win test (the pure-Python path)"""
+    bitboard = BitBoard.from_board(board, win_condition, symbols)
+    if bitboard.is_win(symbols[0]):
+        return FIRST_WINS
+    if bitboard.is_win(symbols[1]):
+        return SECOND_WINS
+    if bitboard.is_full():
+        return DRAW
+    return ONGOING
+
+def classify_boards(boards, win_condition: int, symbols: tuple = ("X", "O")) -> list:
+    """Returns ONGOING, FIRST_WINS, SECOND_WINS or DRAW for each board
+
+    boards is a list of list-of-lists boards, or (with NumPy) an int8 array of one board or a stack of
+    boards as produced by encode_boards. Without NumPy each board goes through the bitboard code instead.
+    """
+    if HAS_NUMPY:
+        stack = boards if isinstance(boards, np.ndarray) else encode_boards(boards, symbols)
+        return classify_stack(stack, win_condition).tolist()
+    return [classify_board(board, win_condition, symbols) for board in boards]